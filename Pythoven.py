@@ -15,14 +15,14 @@
 '''
 @author: darkspork,tehdog
 '''
-from __future__ import print_function # for python2 compatibility
-
-try: from midiutil.MidiFile3 import MIDIFile
-except ImportError:
-    from midiutil.MidiFile import MIDIFile
+from midiutil.MidiFile3 import MIDIFile
     
-import random, os, errno, sys, Waves
+import random, os, errno, sys, io, Waves
+try: from multiprocessing.shared_memory import SharedMemory
+except ImportError:
+    SharedMemory = None # python < 3.8, always render tracks in this process
 from random import randint      # Used in wrand
+from shutil import which
 
 SONGLEN=20
 
@@ -311,7 +311,7 @@ def rlen(e):
         return l
     return 1
         
-def midiSing(sheet, instruments, key, ticktime, filename):
+def midiSing(sheet, instruments, key, ticktime, filename, **options):
     offset = NOTES.index(key) + 60 # Middle C is MIDI note #60    
     midi=MIDIFile(len(sheet))
     replaceprint('Creating midi...')
@@ -331,58 +331,313 @@ def midiSing(sheet, instruments, key, ticktime, filename):
     replaceprint('Synth complete!')
     print("\nMID output to: \"" + filename+ ".mid\"")
     
-def mp3Sing(loopedsheet, instruments, key, ticktime, filename):
-    wavSing(loopedsheet,instruments, key,ticktime,filename, True)
-    replaceprint('Encoding mp3 with ffmpeg...')
-    import subprocess
-    hasffmpeg = subprocess.call(["which", "ffmpeg"], stdout=subprocess.PIPE) == 0
-    if hasffmpeg:
-        cmdline = ["ffmpeg", "-loglevel", "error"]
-        cmdline += ["-i", filename+".wav", "-ab", "128k"]
-        cmdline += ["-metadata", "title=" + filename.split('/')[-1], "-metadata", "artist=Pythoven 2", "-metadata", "album=" + instruments[0].capitalize()]
-        cmdline += [filename+".mp3"]
-        mp3success = subprocess.call(cmdline) == 0
-        replaceprint('Synth complete!')
-        if mp3success: print("\nMP3 output to: \"" + filename+ ".mp3\"")
-        else: print("\nMP3 output failed")
+# the mp3 encoder, it reads raw frames from stdin. {format} {rate} {channels} describe them,
+# {output} is the mp3 file, {title} and {album} are the song name and first instrument
+MP3_ENCODER = ['ffmpeg', '-loglevel', 'error', '-f', '{format}', '-ar', '{rate}', '-ac', '{channels}', '-i', 'pipe:0',
+               '-ab', '128k', '-metadata', 'title={title}', '-metadata', 'artist=Pythoven 2', '-metadata', 'album={album}',
+               '-y', '{output}']
+
+def ffmpegFormat(config):
+    """ffmpegFormat - returns ffmpeg's name of the raw frames Waves writes for config"""
+    if config.floating:
+        name = 'f32'
+    elif config.sampleWidth == 1:
+        return 'u8'
     else:
-        print("ffmpeg not found, no mp3 output")
-    os.remove(filename+".wav") 
-    
-def wavSing(loopedsheet, instruments, key, ticktime, filename, hidefinal=False):
-    from Waves import initArray, FREQS
-    cues = []
-    offset = NOTES.index(key) + 48 # Middle C is MIDI note #48    
-    for track in loopedsheet:
-        cuedtrack = track[1:]
-        cuedtrack.append((track[0], 0)) # append tracklength to the end so i+1 still works for last note
-        cues.append([(cuedtrack[i + 1][0] - cuedtrack[i][0], cuedtrack[i][1] + offset) for i in range(0, len(cuedtrack) - 1)])
-    # cues now contains the sheet in a usable format
+        name = 's%d' % (config.sampleWidth * 8)
+    return name + ('le' if sys.byteorder == 'little' else 'be')
+
+encoderpaths = {} # encoder name -> path (None if missing), see findEncoder
+
+def findEncoder(name):
+    """findEncoder - returns the path of an encoder binary or None, looked up once per process"""
+    if name not in encoderpaths:
+        encoderpaths[name] = which(name)
+    return encoderpaths[name]
+
+class EncoderPool:
+    """EncoderPool - encodes finished songs in the background while the next ones are synthesized
+        At most size encoder processes run at a time, each fed by its own thread.
+        Further songs wait in a queue of at most queued songs; when that is full
+        submit() blocks, so rendering never gets far ahead of encoding.
+        size    - the number of encoders running at once
+        queued  - how many rendered songs may wait for an encoder
+        encoder - the encoder command (default: MP3_ENCODER)
+        jobs is a list of (output file, seconds encoding took, success) of every finished song"""
+    def __init__(self, size=2, queued=2, encoder=None):
+        import threading
+        from queue import Queue
+        self.encoder = encoder or MP3_ENCODER
+        self.path = findEncoder(self.encoder[0])
+        self.queue = Queue(queued)
+        self.jobs = []
+        self.lock = threading.Lock()
+        self.threads = [threading.Thread(target=self.work) for i in range(0, size)]
+        for thread in self.threads:
+            thread.daemon = True
+            thread.start()
+
+    def submit(self, frames, command, output):
+        """submit - queue a song for encoding
+            frames  - its raw frames
+            command - the filled in encoder command (see encoderCommand)
+            output  - the file the encoder writes, for jobs"""
+        self.queue.put((frames, command, output))
+
+    def work(self):
+        import subprocess
+        while True:
+            job = self.queue.get()
+            if job is None:
+                return
+            frames, command, output = job
+            starttime = datetime.now()
+            try:
+                process = subprocess.Popen([self.path] + command[1:], stdin=subprocess.PIPE)
+                process.communicate(frames)
+                success = process.returncode == 0
+            except (IOError, OSError):
+                success = False
+            with self.lock:
+                self.jobs.append((output, (datetime.now() - starttime).total_seconds(), success))
+
+    def join(self):
+        """join - wait until every queued song is encoded, returns jobs"""
+        for thread in self.threads:
+            self.queue.put(None)
+        for thread in self.threads:
+            thread.join()
+        return self.jobs
+
+def encoderCommand(encoder, filename, instruments, config):
+    """encoderCommand - fills in the placeholders of an encoder command like MP3_ENCODER"""
+    fields = dict(format=ffmpegFormat(config), rate=config.sampleRate, channels=config.channels,
+                  title=filename.split('/')[-1], album=instruments[0].capitalize(), output=filename + '.mp3')
+    return [arg.format(**fields) for arg in encoder]
+
+def mp3Sing(loopedsheet, instruments, key, ticktime, filename, hidefinal=False, encoder=None, pool=None,
+            start=None, end=None, config=None, **options):
+    """mp3Sing - encode the song while it is synthesized, piping raw frames into the encoder
+        (no wav file is written). Without the encoder the song is written as wav instead.
+        encoder - the encoder command (default: MP3_ENCODER)
+        pool    - an EncoderPool: render the whole song, then leave the encoding to the pool
+        start, end, config - see wavSing"""
+    import subprocess
+    if pool is not None:
+        encoder = pool.encoder
+    encoder = encoder or MP3_ENCODER
+    path = findEncoder(encoder[0])
+    if not path:
+        print("%s not found, writing wav instead of mp3" % (encoder[0],))
+        return wavSing(loopedsheet, instruments, key, ticktime, filename, hidefinal, start=start, end=end, config=config, **options)
+    plan = RenderPlan(loopedsheet, instruments, key, ticktime, config)
+    first, last = plan.sampleRange(start, end)
+    command = encoderCommand(encoder, filename, instruments, plan.config)
+    if pool is not None:
+        startprogress('Generating waves: ')
+        frames = io.BytesIO()
+        streamWaves(plan, Waves.PcmWriter(frames, plan.config), first, last)
+        pool.submit(frames.getvalue(), command, filename + ".mp3")
+        replaceprint('Synth complete, queued for encoding')
+        if not hidefinal: print('')
+        return
+    process = subprocess.Popen([path] + command[1:], stdin=subprocess.PIPE)
+    startprogress('Encoding mp3: ')
+    try:
+        streamWaves(plan, Waves.PcmWriter(process.stdin, plan.config), first, last)
+    except IOError as exc:
+        if exc.errno != errno.EPIPE: raise # the encoder went away, its exit status tells why
+    finally:
+        try:
+            process.stdin.close()
+        except IOError:
+            pass
+    mp3success = process.wait() == 0
+    replaceprint('Synth complete!')
+    if hidefinal: return
+    if mp3success: print("\nMP3 output to: \"" + filename+ ".mp3\"")
+    else: print("\nMP3 output failed")
+
+
+class RenderPlan:
+    """RenderPlan - a looped sheet compiled to absolute sample positions
+        Every note starts on the sample its tick falls on, so rounding never adds up
+        and tracks stay in sync however long the song is. Any range of samples
+        can be rendered on its own.
+        loopedsheet - a looped music sheet
+        instruments - a list of instruments to use, one per track
+        key         - the key to sing in
+        ticktime    - the time each tick takes, in milliseconds
+        config      - the Waves.RenderConfig to render for"""
+    def __init__(self, loopedsheet, instruments, key, ticktime, config=None):
+        from Waves import FREQS
+        self.config = config or Waves.DEFAULT_CONFIG
+        self.ticktime = ticktime
+        self.instruments = list(instruments[:len(loopedsheet)])
+        self.vol = 1.0 / len(loopedsheet)
+        offset = NOTES.index(key) + 48 # Middle C is MIDI note #48    
+        self.tracks = []
+        for track in loopedsheet:
+            starts = [self.tickToSample(time) for (time, note) in track[1:]]
+            starts.append(self.tickToSample(track[0])) # the end of the last note
+            self.tracks.append([(starts[i], starts[i + 1] - starts[i], FREQS[note + offset])
+                                for i, (time, note) in enumerate(track[1:])])
+        self.offsets = [[note[0] for note in track] for track in self.tracks] # for finding the first note of a range
+        self.length = max([self.tickToSample(track[0]) for track in loopedsheet])
+
+    def tickToSample(self, tick):
+        return int(tick * self.ticktime * self.config.sampleRate // 1000)
+
+    def sampleRange(self, start=None, end=None):
+        """sampleRange - converts a time range in seconds (None for the song's start/end)
+            returns the range [first, last) of samples, clipped to the song"""
+        first = 0 if start is None else int(start * self.config.sampleRate)
+        last = self.length if end is None else int(end * self.config.sampleRate)
+        last = min(max(last, 0), self.length)
+        return min(max(first, 0), last), last
+
+    def countNotes(self, start=0, end=None):
+        """countNotes - returns the number of notes sounding in samples [start, end)"""
+        if end is None:
+            end = self.length
+        return sum([len([1 for (offset, sampleCount, freq) in track if offset < end and offset + sampleCount > start])
+                    for track in self.tracks])
+
+    def renderTrack(self, index, start=0, end=None, out=None, progress=None):
+        """renderTrack - renders samples [start, end) of a track, see Waves.renderTrack
+            Notes crossing the range edges are synthesized from their beginning and cut,
+            so stateful instruments like guitar sound the same as in a full render."""
+        if end is None:
+            end = self.length
+        return Waves.renderTrack(self.tracks[index], self.instruments[index], self.vol, out, start, end, progress, self.config, self.offsets[index])
+
+    def render(self, start=0, end=None):
+        """render - returns the waves of samples [start, end) of all tracks"""
+        return [self.renderTrack(index, start, end) for index in range(0, len(self.tracks))]
+
+    def mix(self, start=0, end=None):
+        """mix - returns samples [start, end) of the song, all tracks mixed"""
+        return Waves.mergeWaves(self.render(start, end))
+
+STREAM_WINDOW = 1.0 # seconds of audio that are mixed and written at a time when streaming
+
+def wavSing(loopedsheet, instruments, key, ticktime, filename, hidefinal=False, stream=False, jobs=1, start=None, end=None, config=None):
+    """wavSing
+        stream - synthesize and write the song window by window (see STREAM_WINDOW)
+                    instead of all at once, so memory use does not grow with the song length
+        jobs   - render the tracks in this many worker processes (ignored when streaming)
+        start, end - only render this part of the song, in seconds (default: all of it).
+                    Notes outside of it are not synthesized at all.
+        config - the Waves.RenderConfig (sample rate, bit depth, channels) to render for"""
+    plan = RenderPlan(loopedsheet, instruments, key, ticktime, config)
+    first, last = plan.sampleRange(start, end)
+    if stream:
+        return streamSing(plan, filename, hidefinal, first, last)
+    if jobs > 1 and len(plan.tracks) > 1 and SharedMemory is not None:
+        return parallelSing(plan, filename, hidefinal, jobs, first, last)
     startprogress('Generating waves: ')
-    waves = []
-    vol = 1.0 / len(cues)
-    notecount = rlen(cues) // 2
-    progress = 0.0
-    instscpy=instruments[:]
-    for track in cues:
-        trackwave = initArray()
-        instrument = instscpy.pop(0)
-        for (duration, note) in track:
-            trackwave.extend(Waves.cachedWaveGen(FREQS[note], duration * ticktime, instrument, vol))
-            progress += 1.0
-            updateprogress(progress / notecount)
-        waves.append(trackwave)
+    notecount = max(1, plan.countNotes(first, last))
+    progress = [0.0]
+    def noteDone():
+        progress[0] += 1.0
+        updateprogress(progress[0] / notecount)
+    waves = [plan.renderTrack(index, first, last, progress=noteDone) for index in range(0, len(plan.tracks))]
+    mixSing(waves, filename, hidefinal, plan.config)
+
+def mixSing(waves, filename, hidefinal=False, config=None):
     replaceprint('Creating mixdown...' + ' ' * 30)
     wave = Waves.mergeWaves(waves)
     replaceprint('Writing file...')
-    Waves.makeWavFile(wave, filename+".wav")
+    Waves.makeWavFile(wave, filename+".wav", config)
+    replaceprint('Synth complete!')
+    if not hidefinal:print("\nWAV output to: \"" + filename + ".wav\"")
+
+def streamWaves(plan, out, first=0, last=None):
+    """streamWaves - mixes samples [first, last) of a plan STREAM_WINDOW at a time and writes them
+        out - where to write the mix to, e.g. a Waves.WavWriter or Waves.PcmWriter"""
+    if last is None:
+        last = plan.length
+    window = int(plan.config.sampleRate * STREAM_WINDOW)
+    for start in range(first, last, window):
+        out.write(plan.mix(start, min(last, start + window)))
+        updateprogress(float(start + window - first) / (last - first))
+
+def streamSing(plan, filename, hidefinal=False, first=0, last=None):
+    if last is None:
+        last = plan.length
+    startprogress('Streaming waves: ')
+    f = Waves.openWavFile(filename+".wav", plan.config, last - first)
+    streamWaves(plan, f, first, last)
+    f.close()
     replaceprint('Synth complete!')
     if not hidefinal:print("\nWAV output to: \"" + filename + ".wav\"")
 
+def renderTrackWorker(task):
+    """renderTrackWorker - renders one planned track into a shared memory buffer (runs in a worker process)"""
+    name, plan, index, first, last, cachedir, bankfile, samplesdir = task
+    Waves.useDiskCache(cachedir)
+    Waves.useBank(bankfile)
+    Waves.useSamples(samplesdir)
+    shm = SharedMemory(name=name)
+    out = shm.buf.cast(Waves.BUS_TYPECODE)
+    plan.renderTrack(index, first, last, out)
+    out.release()
+    shm.close()
+
+def parallelSing(plan, filename, hidefinal, jobs, first=0, last=None):
+    from multiprocessing import Pool
+    config = plan.config
+    if last is None:
+        last = plan.length
+    buffers = [SharedMemory(create=True, size=max(1, last - first) * Waves.BUS_ITEMSIZE) for track in plan.tracks]
+    try:
+        cachedir = Waves.diskcache and Waves.diskcache.directory
+        bankfile = Waves.bank and Waves.bank.filename
+        tasks = [(shm.name, plan, index, first, last, cachedir, bankfile, Waves.samplesdir) for (index, shm) in enumerate(buffers)]
+        startprogress('Generating waves (%d jobs): ' % jobs)
+        pool = Pool(min(jobs, len(tasks)))
+        try:
+            for done, _ in enumerate(pool.imap_unordered(renderTrackWorker, tasks)):
+                updateprogress(float(done + 1) / len(tasks))
+        finally:
+            pool.close()
+            pool.join()
+        waves = [shm.buf[:(last - first) * Waves.BUS_ITEMSIZE].cast(Waves.BUS_TYPECODE) for shm in buffers]
+        mixSing(waves, filename, hidefinal, config)
+        for wave in waves:
+            wave.release()
+    finally:
+        for shm in buffers:
+            shm.close()
+            shm.unlink()
+
+LIVE_LATENCY = 0.2 # seconds of audio liveSing may render ahead of the player
+
+def liveSing(loopedsheet, instruments, key, ticktime, filename, hidefinal=False, out=None, latency=LIVE_LATENCY,
+             start=None, end=None, config=None, **options):
+    """liveSing - play the song in real time as raw PCM (no wav header)
+        filename - ignored
+        out      - a binary file object or file descriptor to write to (default: stdout)
+        latency  - how many seconds may be rendered ahead, blocks of half of it are rendered at a time
+        start, end, config - see wavSing"""
+    if out is None:
+        out = getattr(sys.stdout, 'buffer', sys.stdout)
+    plan = RenderPlan(loopedsheet, instruments, key, ticktime, config)
+    first, last = plan.sampleRange(start, end)
+    sink = Waves.LiveSink(out, plan.config, latency)
+    block = max(1, int(plan.config.sampleRate * latency / 2))
+    try:
+        for start in range(first, last, block):
+            sink.write(plan.mix(start, min(last, start + block)))
+    except IOError as exc:
+        if exc.errno != errno.EPIPE: raise # the player went away
+    replaceprint('Live output finished, %d underruns (%.3fs of silence)' % (sink.underruns, sink.lag))
+    if not hidefinal:print('')
+
 # removing this for now: def waveGenII(freq, length, instruments):
-outformats={'mid':midiSing,'wav':wavSing, 'mp3':mp3Sing}
+outformats={'mid':midiSing,'wav':wavSing, 'mp3':mp3Sing, 'live':liveSing}
 
-def sing(sheet, key='C', ticktime=125, instruments=(), filename='./test.wav', fmt='wav'):
+def sing(sheet, key='C', ticktime=125, instruments=(), filename='./test.wav', fmt='wav', **options):
     """sing
         sheet       - a music sheet to sing
         key         - the key to sing in
@@ -393,6 +648,7 @@ def sing(sheet, key='C', ticktime=125, instruments=(), filename='./test.wav', fm
                         120 beats per minute
         instruments - a list of instruments to use
         filename    - the name of the wav file to make
+        options     - passed on to the output format, see wavSing
         return None, create a wav file from the sheet"""
     
     vprint('Calculating track length...')
@@ -407,7 +663,7 @@ def sing(sheet, key='C', ticktime=125, instruments=(), filename='./test.wav', fm
     if not instruments:
         instruments = [Waves.DEFAULT_INSTRUMENT] * len(sheet)
     singer=outformats[fmt]
-    singer(loopedsheet, instruments, key, ticktime, filename)
+    singer(loopedsheet, instruments, key, ticktime, filename, **options)
     
 def mkdirp(path):
     try:
@@ -417,7 +673,7 @@ def mkdirp(path):
         else: raise
 
 
-def makeSong(instrument, songname, fmt):
+def makeSong(instrument, songname, fmt, **options):
     if not songname: songname = randomname()
     print('Seed and trackname: ' + songname)
     # okay so I'm going to try something here:
@@ -438,23 +694,84 @@ def makeSong(instrument, songname, fmt):
     mkdirp(dirname)
     outname = dirname + "/Pythoven - %s" % songname
     
-    sing(sheet, key='C', ticktime=125, instruments=[instrument] * len(sheet), filename=outname, fmt=fmt)
+    sing(sheet, key='C', ticktime=125, instruments=[instrument] * len(sheet), filename=outname, fmt=fmt, **options)
+
+# what --bank puts into a new note bank: the notes makeSong can play
+BANK_TICKTIME = 125
+BANK_NOTES = slice(24, 84) # C2 to B6
+BANK_VOLS = (1.0 / 2,) # makeSong writes two tracks
 
 ############################## MAIN #####################################
 from RandomName import randomname
 from datetime import datetime
 from Waves import INSTRUMENTS
-import argparse
+import argparse, shlex
 
 if __name__ == '__main__':
     try:
         parser = argparse.ArgumentParser(description='Generate a song')
-        parser.add_argument('instrument', default='guitar', choices=INSTRUMENTS, help='use this instrument/waveform; will be ignored when using midi (default: %(default)s)')
+        parser.add_argument('instrument', default='guitar', choices=list(INSTRUMENTS) + ['sampler'], help='use this instrument/waveform; will be ignored when using midi (default: %(default)s)')
         parser.add_argument('-s', '--seed', metavar='name', help='use a special songname/seed (default: random)')
-        parser.add_argument('-f', metavar='wav/mid', default='wav', choices=outformats.keys(), help='output format (default: %(default)s)')
+        parser.add_argument('-f', metavar='wav/mp3/mid/live', default='wav', choices=outformats.keys(), help='output format (default: %(default)s)')
+        parser.add_argument('--stream', action='store_true', help='write the wav file while synthesizing instead of at the end')
+        parser.add_argument('-j', '--jobs', metavar='n', type=int, default=1, help='render tracks in n processes (default: %(default)s)')
+        parser.add_argument('--start', metavar='sec', type=float, help='only render the song from here on')
+        parser.add_argument('--end', metavar='sec', type=float, help='only render the song up to here')
+        parser.add_argument('--rate', metavar='hz', type=int, default=Waves.SAMPLE_RATE, help='sample rate (default: %(default)s)')
+        parser.add_argument('--bits', type=int, default=Waves.SAMPLE_WIDTH * 8, choices=(8, 16, 24, 32), help='bits per sample (default: %(default)s)')
+        parser.add_argument('--channels', metavar='n', type=int, default=1, help='channels of the wav file (default: %(default)s)')
+        parser.add_argument('--float', action='store_true', help='write 32 bit float samples (the unquantized mix)')
+        parser.add_argument('--no-dither', action='store_true', help='round the mix to the sample width without dither noise')
+        parser.add_argument('--noise-seed', metavar='n', type=int, default=0, help='seed of the noise plucked instruments start from (default: %(default)s)')
+        parser.add_argument('--preview', action='store_true', help='render a quick draft at %d Hz' % Waves.PREVIEW_CONFIG.sampleRate)
+        parser.add_argument('--latency', metavar='sec', type=float, default=LIVE_LATENCY, help='live output: how far to render ahead (default: %(default)s)')
+        parser.add_argument('--encoder', metavar='cmd', help='mp3 output: the encoder command reading raw frames from stdin, '
+                            'with {format} {rate} {channels} {output} {title} {album} placeholders (default: ffmpeg)')
+        parser.add_argument('-n', '--count', metavar='n', type=int, default=1, help='make n songs (numbered if --seed is given)')
+        parser.add_argument('--encoders', metavar='n', type=int, default=2, help='mp3 output of several songs: encode up to n songs at once (default: %(default)s)')
+        parser.add_argument('--cache-dir', metavar='dir', help='keep rendered notes in this directory for later runs')
+        parser.add_argument('--bank', metavar='file', help='play notes from this note bank, building it first if it does not exist')
+        parser.add_argument('--samples', metavar='dir', help='the wav files the sampler instrument plays, named after their note (A4.wav) or frequency (440.wav)')
         args=parser.parse_args()
+        if args.instrument == 'sampler' and not args.samples:
+            parser.error('the sampler instrument needs --samples')
+        if args.samples:
+            try:
+                Waves.useSamples(args.samples)
+            except (OSError, ValueError) as e:
+                parser.error('--samples: %s' % e)
+        Waves.useDiskCache(args.cache_dir)
+        config = Waves.RenderConfig(args.rate, 4 if args.float else args.bits // 8, args.channels, not args.no_dither, args.noise_seed, args.float)
+        if args.preview:
+            config = Waves.RenderConfig(Waves.PREVIEW_CONFIG.sampleRate, config.sampleWidth, config.channels, config.dither, config.seed, config.floating)
+        if args.bank:
+            if not os.path.exists(args.bank):
+                startprogress('Building note bank: ')
+                notes = Waves.bankNotes([args.instrument], BANK_TICKTIME, Waves.FREQS[BANK_NOTES], vols=BANK_VOLS, config=config)
+                Waves.buildBank(args.bank, notes, config, updateprogress)
+                print('')
+            Waves.useBank(args.bank)
+        options = dict(stream=args.stream, jobs=args.jobs, start=args.start, end=args.end, config=config)
+        if args.f == 'mp3' and args.encoder:
+            options.update(encoder=shlex.split(args.encoder))
+        if args.f == 'live':
+            # the samples go to stdout, everything else to stderr
+            options.update(out=getattr(sys.stdout, 'buffer', sys.stdout), latency=args.latency)
+            sys.stdout = sys.stderr
         starttime = datetime.now()
-        makeSong(args.instrument, args.seed, args.f)
+        if args.count > 1:
+            pool = None
+            if args.f == 'mp3':
+                pool = options['pool'] = EncoderPool(args.encoders, encoder=options.pop('encoder', None))
+            for i in range(0, args.count):
+                makeSong(args.instrument, args.seed and '%s %d' % (args.seed, i + 1), args.f, **options)
+            if pool:
+                replaceprint('Waiting for the encoders...')
+                print('')
+                for (output, seconds, success) in pool.join():
+                    print('%s "%s" in %.3fs' % ('Encoded' if success else 'Failed to encode', output, seconds))
+        else:
+            makeSong(args.instrument, args.seed, args.f, **options)
         print("Generation took " + str(round((datetime.now() - starttime).total_seconds(), 3)) + "s")
         
     except KeyboardInterrupt:
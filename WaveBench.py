@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# WaveBench - micro benchmarks for Waves
+# Prints the results as JSON, and compares them against a stored baseline:
+#   python3 WaveBench.py --save baseline.json      # before a change
+#   python3 WaveBench.py --baseline baseline.json  # after it, exits with 1 on a regression
+
+import os, sys, json, platform, tempfile, timeit, Waves
+
+THRESHOLD = 0.2 # a result this much worse than the baseline (20%) is a regression
+NOTE_SECONDS = 1.0 # length of the notes instruments render
+
+def timeBest(fn, repeat, setup=None):
+    """timeBest - returns the fastest of repeat runs of fn in seconds
+        setup - called before every run, outside the timing"""
+    best = None
+    for i in range(0, repeat):
+        if setup:
+            setup()
+        starttime = timeit.default_timer()
+        fn()
+        elapsed = timeit.default_timer() - starttime
+        if best is None or elapsed < best:
+            best = elapsed
+    return max(best, 1e-9)
+
+def result(value, unit, higherIsBetter=True):
+    return {'value': value, 'unit': unit, 'higherIsBetter': higherIsBetter}
+
+def benchInstruments(repeat, config):
+    """benchInstruments - samples per second every instrument renders (without any cache)"""
+    sampleCount = int(config.sampleRate * NOTE_SECONDS)
+    results = {}
+    for name in sorted(Waves.INSTRUMENTS):
+        instrument = Waves.INSTRUMENTS[name]
+        seconds = timeBest(lambda: instrument(440.0, sampleCount, 0.5, config), repeat)
+        results['instrument.%s' % name] = result(sampleCount / seconds, 'samples/s')
+    return results
+
+def benchCache(repeat, config, waveType='sine', notes=20):
+    """benchCache - how long cachedWaveGen takes per note, starting with an empty note cache
+        (miss) and with every note cached (hit). waveType should have an oscillator, then
+        a miss renders the note and stores it as the prefix of its pitch, and a hit slices
+        the prefix and applies the envelope (see Waves.cachedNoteParts)."""
+    sampleCount = int(config.sampleRate * NOTE_SECONDS)
+    freqs = Waves.FREQS[30:30 + notes]
+    def notesOnce():
+        for freq in freqs:
+            Waves.cachedWaveGen(freq, None, waveType, 0.5, sampleCount, config)
+    miss = timeBest(notesOnce, repeat, Waves.cache.clear) / notes
+    notesOnce() # fill the cache
+    hit = timeBest(notesOnce, repeat) / notes
+    Waves.cache.clear()
+    return {'cachedWaveGen.miss': result(miss * 1e6, 'us/note', False),
+            'cachedWaveGen.hit': result(hit * 1e6, 'us/note', False)}
+
+def benchMerge(repeat, config, tracks=4, seconds=10.0):
+    """benchMerge - samples per second (summed over all tracks) mergeWaves mixes"""
+    sampleCount = int(config.sampleRate * seconds)
+    waves = [Waves.sineOscillator(Waves.FREQS[40 + 5 * i], sampleCount, 0.5, config) for i in range(0, tracks)]
+    results = {}
+    for clip in ('hard', 'soft'):
+        elapsed = timeBest(lambda: Waves.mergeWaves(waves, clip=clip), repeat)
+        results['mergeWaves.%d.%s' % (tracks, clip)] = result(tracks * sampleCount / elapsed, 'samples/s')
+    return results
+
+def benchWavFile(repeat, config, seconds=10.0):
+    """benchWavFile - megabytes per second of wav file makeWavFile writes (quantizing included)"""
+    wave = Waves.sineOscillator(440.0, int(config.sampleRate * seconds), 0.5, config)
+    fd, filename = tempfile.mkstemp(suffix='.wav')
+    os.close(fd)
+    try:
+        elapsed = timeBest(lambda: Waves.makeWavFile(wave, filename, config), repeat)
+        size = os.path.getsize(filename)
+    finally:
+        os.remove(filename)
+    return {'makeWavFile': result(size / elapsed / (1 << 20), 'MB/s')}
+
+def runBenchmarks(repeat=3, tracks=4, config=None):
+    """runBenchmarks - runs every benchmark, returns the report as a dict"""
+    config = config or Waves.DEFAULT_CONFIG
+    results = {}
+    results.update(benchInstruments(repeat, config))
+    results.update(benchCache(repeat, config))
+    results.update(benchMerge(repeat, config, tracks))
+    results.update(benchWavFile(repeat, config))
+    return {'python': platform.python_version(),
+            'numpy': Waves.numpy.__version__ if Waves.USE_NUMPY else None,
+            'config': repr(config),
+            'results': results}
+
+def compareResults(report, baseline, threshold=THRESHOLD):
+    """compareResults - compares a report against a baseline report
+        returns a list of (name, value, baseline value, change) for every result that got
+        worse by more than threshold; change is the relative slowdown (0.25 for 25% worse)"""
+    regressions = []
+    for name, now in sorted(report['results'].items()):
+        before = baseline['results'].get(name)
+        if not before or not before['value'] or not now['value']:
+            continue
+        if now['higherIsBetter']:
+            change = before['value'] / now['value'] - 1
+        else:
+            change = now['value'] / before['value'] - 1
+        if change > threshold:
+            regressions.append((name, now['value'], before['value'], change))
+    return regressions
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Benchmark the synthesizer')
+    parser.add_argument('-o', '--output', metavar='file', help='write the JSON report here (default: stdout)')
+    parser.add_argument('--save', metavar='file', help='also store the report as a baseline for --baseline')
+    parser.add_argument('--baseline', metavar='file', help='compare against this report, exit with 1 on a regression')
+    parser.add_argument('--threshold', metavar='x', type=float, default=THRESHOLD, help='how much worse counts as a regression (default: %(default)s)')
+    parser.add_argument('-r', '--repeat', metavar='n', type=int, default=3, help='runs per benchmark, the fastest counts (default: %(default)s)')
+    parser.add_argument('--tracks', metavar='n', type=int, default=4, help='tracks mergeWaves mixes (default: %(default)s)')
+    parser.add_argument('--no-numpy', action='store_true', help='benchmark the pure Python code')
+    args = parser.parse_args()
+    if args.no_numpy:
+        Waves.USE_NUMPY = False
+    report = runBenchmarks(args.repeat, args.tracks)
+    text = json.dumps(report, indent=2, sort_keys=True)
+    for filename in (args.output, args.save):
+        if filename:
+            with open(filename, 'w') as f:
+                f.write(text + '\n')
+    if not args.output:
+        print(text)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if (baseline.get('numpy') is None) != (report['numpy'] is None):
+            sys.stderr.write('warning: the baseline was measured %s numpy\n' % ('without' if baseline.get('numpy') is None else 'with'))
+        regressions = compareResults(report, baseline, args.threshold)
+        for (name, value, before, change) in regressions:
+            sys.stderr.write('regression: %s %.4g -> %.4g %s (%d%% worse)\n'
+                             % (name, before, value, report['results'][name]['unit'], round(change * 100)))
+        if regressions:
+            sys.exit(1)
+        sys.stderr.write('no regressions against %s\n' % args.baseline)
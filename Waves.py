@@ -1,16 +1,215 @@
 #needs patched wave:
-try: import patchedwavelibpy3 as wave
-except ImportError:
-    import patchedwavelibpy2 as wave
+import patchedwavelibpy3 as wave
 #import wave
-import random, array, math
+import random, array, math, time, os, sys, mmap, hashlib, bisect, json, struct, re
+from collections import OrderedDict
+# optional array-at-a-time backend. The NumPy oscillators produce the same float samples
+# as the pure-Python loops, except sineWave where numpy.sin and math.sin may disagree
+# in the last bit. mergeWaves sums in float32 with NumPy and in double precision without,
+# so mixes of more than two tracks or with gains may disagree in the last bit too, and the
+# quantized samples by 1. The dither noise of Quantizer differs between the two.
+try: import numpy
+except ImportError:
+    numpy = None
+USE_NUMPY = numpy is not None
 SAMPLE_WIDTH = 2
 MAX = (1 << (SAMPLE_WIDTH*8-1)) - 1 # maximum short value, 32767
-FMT = ['','b','h','','l'] #index=byte count
+FMT = ['','b','h','i','i'] #index=byte count, 24 bit samples are kept in 32 bit ints until they are written
 SAMPLE_RATE = 44100
 DEFAULT_INSTRUMENT = 'square'
+# notes and mixes are float waves between -1 and 1, only Quantizer turns them into ints
+BUS_TYPECODE = 'f'
+BUS_ITEMSIZE = array.array(BUS_TYPECODE).itemsize
+
+class RenderConfig:
+    """RenderConfig - the format everything is rendered in
+        sampleRate  - samples per second
+        sampleWidth - bytes per sample: 1 (8 bit), 2 (16 bit), 3 (24 bit) or 4 (32 bit)
+        channels    - the number of channels of the wav file (they all get the same samples)
+        dither      - add TPDF dither noise when the float mix is quantized to sampleWidth
+        seed        - seed of the noise instruments like guitar start from, see noiseRandom
+        floating    - write 32 bit float samples instead of ints (sampleWidth must be 4)"""
+    def __init__(self, sampleRate=SAMPLE_RATE, sampleWidth=SAMPLE_WIDTH, channels=1, dither=True, seed=0, floating=False):
+        if sampleWidth not in (1, 2, 3, 4) or (floating and sampleWidth != 4):
+            raise ValueError('bad sample width: %r' % (sampleWidth,))
+        self.sampleRate = sampleRate
+        self.sampleWidth = sampleWidth
+        self.channels = channels
+        self.dither = dither
+        self.seed = seed
+        self.floating = floating
+        self.max = (1 << (sampleWidth * 8 - 1)) - 1
+        self.typecode = BUS_TYPECODE if floating else FMT[sampleWidth]
+        self.itemsize = array.array(self.typecode).itemsize
+
+    def key(self):
+        """key - what notes rendered with this config depend on, for cache keys"""
+        return (self.sampleRate, self.seed)
+
+    def __repr__(self):
+        return 'RenderConfig(%r, %r, %r, dither=%r, seed=%r, floating=%r)' % (self.sampleRate, self.sampleWidth, self.channels,
+                                                                              self.dither, self.seed, self.floating)
+
+DEFAULT_CONFIG = RenderConfig()
+PREVIEW_CONFIG = RenderConfig(sampleRate=22050) # quick drafts, about half the work
+
+CACHE_BYTES = 64 << 20 # memory budget of the note cache
+
+class NoteCache:
+    """NoteCache - keeps the most recently used note waves up to a memory budget
+        maxBytes - the budget in bytes of samples, None for no limit
+        hits, misses, evictions and bytes count what the cache is doing; rejected counts
+        waves bigger than the whole budget, which are never stored"""
+    def __init__(self, maxBytes=None):
+        self.maxBytes = maxBytes
+        self.entries = OrderedDict()
+        self.clear()
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.rejected = 0
+        self.bytes = 0
+
+    def get(self, key):
+        """get - returns the wave stored for key (marking it as recently used) or None"""
+        values = self.entries.pop(key, None)
+        if values is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries[key] = values
+        return values
+
+    def put(self, key, values):
+        size = len(values) * values.itemsize
+        if key in self.entries:
+            old = self.entries.pop(key)
+            self.bytes -= len(old) * old.itemsize
+        if self.maxBytes is not None and size > self.maxBytes:
+            self.rejected += 1 # would evict everything and still not fit
+            return
+        self.entries[key] = values
+        self.bytes += size
+        while self.maxBytes is not None and self.bytes > self.maxBytes:
+            oldkey, old = self.entries.popitem(last=False)
+            self.bytes -= len(old) * old.itemsize
+            self.evictions += 1
+
+    def discard(self, test):
+        """discard - removes every entry whose key test(key) is true for"""
+        for key in [key for key in self.entries if test(key)]:
+            values = self.entries.pop(key)
+            self.bytes -= len(values) * values.itemsize
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def stats(self):
+        return {'entries': len(self.entries), 'bytes': self.bytes, 'maxBytes': self.maxBytes,
+                'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions, 'rejected': self.rejected}
+
+cache = NoteCache(CACHE_BYTES)
+
+ENGINE_VERSION = 5 # increase whenever an instrument sounds different, it invalidates the disk cache
+
+class DiskCache:
+    """DiskCache - note waves stored as raw float files, shared between runs and processes
+        directory - where to keep the files, created if missing"""
+    def __init__(self, directory):
+        self.directory = directory
+        try:
+            os.makedirs(directory)
+        except OSError:
+            if not os.path.isdir(directory): raise
+
+    def path(self, key):
+        name = repr((ENGINE_VERSION, sys.byteorder) + key).encode()
+        return os.path.join(self.directory, '%s-%d-%s.pcm' % (key[0], key[2], hashlib.sha1(name).hexdigest()[:20]))
+
+    def get(self, key):
+        """get - returns the stored wave for key as a memory mapped memoryview, or None"""
+        try:
+            f = open(self.path(key), 'rb')
+        except IOError:
+            return None
+        with f:
+            if not os.fstat(f.fileno()).st_size:
+                return initArray(0)
+            return memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)).cast(BUS_TYPECODE)
+
+    def put(self, key, values):
+        path = self.path(key)
+        tmppath = '%s.%d.%s.tmp' % (path, os.getpid(), os.urandom(8).hex())
+        try:
+            with open(tmppath, 'wb') as f:
+                f.write(values)
+            os.rename(tmppath, path) # atomic, concurrent writers of the same note just replace each other
+        except BaseException:
+            try:
+                os.remove(tmppath)
+            except OSError:
+                pass
+            raise
+
+diskcache = None
+
+def useDiskCache(directory):
+    """useDiskCache - keep rendered notes in directory (None to stop)"""
+    global diskcache
+    diskcache = DiskCache(directory) if directory else None
+
+BANK_MAGIC = b'PVBANK\x00\x01'
+
+class NoteBank:
+    """NoteBank - a file of prerendered notes, memory mapped so loading it costs next to nothing
+        The file holds BANK_MAGIC, the byte length of the index (32 bit little endian),
+        the index as JSON (engine version, byte order and a list of
+        [waveType, freq, sampleCount, vol, sampleRate, seed, offset] notes, see instrumentKey
+        for instruments with more in between) and, starting at
+        the next multiple of 16 bytes, the float samples of all notes. See buildBank.
+        filename - the bank file"""
+    def __init__(self, filename):
+        self.filename = filename
+        with open(filename, 'rb') as f:
+            if f.read(len(BANK_MAGIC)) != BANK_MAGIC:
+                raise ValueError('not a note bank: %r' % (filename,))
+            indexsize = struct.unpack('<I', f.read(4))[0]
+            index = json.loads(f.read(indexsize).decode('utf-8'))
+            if index['version'] != ENGINE_VERSION or index['byteorder'] != sys.byteorder:
+                raise ValueError('note bank %r was built by another version or machine, build it again' % (filename,))
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        start = bankDataStart(indexsize)
+        self.samples = memoryview(self.map)[start:].cast(BUS_TYPECODE)
+        self.notes = dict([(tuple(note[:-1]), note[-1]) for note in index['notes']])
+
+    def get(self, key):
+        """get - returns the note for a cachedWaveGen key as a memoryview into the bank, or None"""
+        offset = self.notes.get(key)
+        if offset is None:
+            return None
+        return self.samples[offset:offset + key[2]]
 
-cache = dict()
+    def __len__(self):
+        return len(self.notes)
+
+    def __contains__(self, key):
+        return key in self.notes
+
+def bankDataStart(indexsize):
+    return (len(BANK_MAGIC) + 4 + indexsize + 15) // 16 * 16
+
+bank = None
+
+def useBank(filename):
+    """useBank - serve notes from the NoteBank in filename (None to stop)"""
+    global bank
+    bank = NoteBank(filename) if filename else None
 
 '''Frequencies of notes
            C        C#       D        D#       E        F        F#       G        G#       A        A#       B
@@ -25,104 +224,825 @@ cache = dict()
         4186.01, 4434.92, 4698.64, 4978.03)'''
 FREQS = [440 * 2 ** (x / 12.0) for x in range(-57, 43)]        
 
-def squareWave(freq, sampleCount, vol):
-    """sineWave
+def squareWave(freq, sampleCount, vol, config=None):
+    """squareWave
         freq - the frequency of the wave
-        length - the length to play the wave for in milliseconds
-        vol - the volume between 0 and 1"""
-    innermult = 2 * freq / SAMPLE_RATE
-    outermult = int(MAX * vol)
-    values = initArray(sampleCount)
-    for i in range(0, sampleCount):
-        values[i] = (int(i * innermult) % 2 * 2 - 1) * outermult    
-    return values
+        sampleCount - the length of the wave in samples
+        vol - the volume between 0 and 1
+        config - the RenderConfig to render for"""
+    config = config or DEFAULT_CONFIG
+    innermult = 2 * freq / config.sampleRate
+    if USE_NUMPY:
+        return numpyToArray((numpy.floor(numpy.arange(sampleCount) * innermult) % 2 * 2 - 1) * vol)
+    return array.array(BUS_TYPECODE, [(int(i * innermult) % 2 * 2 - 1) * vol for i in range(0, sampleCount)])
 
-def guitarWave(freq, sampleCount, vol, damping=0.996):
-    n = int(SAMPLE_RATE // freq) # noise loop filter length
-    zn = array.array(FMT[SAMPLE_WIDTH], [int((random.random() * 2 - 1) * MAX * vol) for i in range(0, n)]) # white noise (in real array for speed)
-    
-    values = initArray(sampleCount)
-    for i in range(0, sampleCount):
-        values[i] = zn[i % n] # read sample from current noise
-        zn[i % n] = int((
-                     zn[ i % n] * 2 + 
-                     zn[(i + 1) % n] + 
-                     zn[(i + 2) % n]
-                    ) * 0.25 * damping) # an average filter (replacement for lowpass)
-    return values
-   
+class KarplusStrong:
+    """KarplusStrong - plucked string synthesis
+        The noise loop is filtered one pass (one period of n samples) at a time:
+        every sample of a pass only depends on the previous pass, except the last two,
+        which already see the new start of the loop. The output is identical to
+        filtering sample by sample.
+        noise   - the initial noise loop, a sequence of floats
+        damping - how much energy a pass keeps (< 1)
+        config  - the RenderConfig to render for"""
+    # throughput counters over all instances, see throughput()
+    samples = 0
+    seconds = 0.0
 
-def sineWave(freq, sampleCount, vol):
-    """sineWave
-        freq - the frequency of the wave
-        length - the length to play the wave for in milliseconds
-        vol - the volume between 0 and 1"""
+    def __init__(self, noise, damping=0.996, config=None):
+        self.config = config or DEFAULT_CONFIG
+        self.n = len(noise)
+        self.mult = 0.25 * damping
+        if USE_NUMPY and self.n > 2:
+            self.ring = numpy.array(noise, dtype=numpy.float64)
+        else:
+            self.ring = list(noise)
+        self.pos = 0 # position in the current pass
+
+    def nextPass(self):
+        ring, mult, n = self.ring, self.mult, self.n
+        if n < 3: # the loop is too short to split into passes
+            for i in range(0, n):
+                ring[i] = (ring[i] * 2 + ring[(i + 1) % n] + ring[(i + 2) % n]) * mult
+            return
+        if isinstance(ring, list):
+            nextring = [(a * 2 + b + c) * mult for a, b, c in zip(ring, ring[1:], ring[2:])]
+            nextring.append((ring[-2] * 2 + ring[-1] + nextring[0]) * mult)
+            nextring.append((ring[-1] * 2 + nextring[0] + nextring[1]) * mult)
+        else:
+            nextring = numpy.empty_like(ring)
+            nextring[:-2] = (ring[:-2] * 2 + ring[1:-1] + ring[2:]) * mult
+            nextring[-2] = (ring[-2] * 2 + ring[-1] + nextring[0]) * mult
+            nextring[-1] = (ring[-1] * 2 + nextring[0] + nextring[1]) * mult
+        self.ring = nextring
+
+    def render(self, sampleCount):
+        """render - continue the string for sampleCount samples
+            returns a wave array"""
+        starttime = time.time()
+        if isinstance(self.ring, list):
+            values = initArray(0)
+            append = values.extend
+        else:
+            values = numpy.empty(sampleCount, dtype=numpy.float64)
+            filled = [0]
+            def append(block):
+                values[filled[0]:filled[0] + len(block)] = block
+                filled[0] += len(block)
+        remaining = sampleCount
+        while remaining > 0:
+            if self.pos == self.n:
+                self.nextPass()
+                self.pos = 0
+            count = min(self.n - self.pos, remaining)
+            append(self.ring[self.pos:self.pos + count])
+            self.pos += count
+            remaining -= count
+        if not isinstance(values, array.array):
+            values = numpyToArray(values)
+        KarplusStrong.samples += sampleCount
+        KarplusStrong.seconds += time.time() - starttime
+        return values
+
+    @staticmethod
+    def throughput():
+        """throughput - returns the samples per second rendered by all strings so far"""
+        if not KarplusStrong.seconds:
+            return 0.0
+        return KarplusStrong.samples / KarplusStrong.seconds
+
+def noiseRandom(freq, config=None):
+    """noiseRandom - returns a private random number generator for the noise of a note
+        It only depends on the frequency and config.seed, never on what ran before,
+        so the same note sounds the same in every process and can be cached."""
+    config = config or DEFAULT_CONFIG
+    digest = hashlib.sha1(repr((freq, config.seed)).encode()).hexdigest()
+    return random.Random(int(digest[:16], 16))
+
+def guitarWave(freq, sampleCount, vol, config=None, damping=0.996):
+    config = config or DEFAULT_CONFIG
+    n = max(1, int(config.sampleRate // freq)) # noise loop filter length (one sample for notes above the sample rate)
+    rand = noiseRandom(freq, config).random
+    noise = [(rand() * 2 - 1) * vol for i in range(0, n)] # white noise
+    return KarplusStrong(noise, damping, config).render(sampleCount)
+
+def sineOscillator(freq, sampleCount, vol, config=None):
+    """sineOscillator - sineWave without the fade, a shorter note is the start of a longer one"""
+    config = config or DEFAULT_CONFIG
     # using the wavelength here would round it a lot, so we calculate 20 wavelengths
     # for example, instead of 440hz we actually use ~439.9
-    calclength = min(sampleCount, int(round(20 * SAMPLE_RATE / freq)))
+    calclength = max(1, int(round(20 * config.sampleRate / freq)))
     innermult = 2 * math.pi * 20 / calclength
-    outermult = MAX * vol
+    if USE_NUMPY:
+        period = numpy.sin(numpy.arange(min(calclength, sampleCount)) * innermult) * vol
+        return numpyToArray(numpy.resize(period, sampleCount))
     values = initArray(sampleCount)
-    for i in range(0, calclength):
-        values[i] = int(math.sin(i * innermult) * outermult)
+    for i in range(0, min(calclength, sampleCount)):
+        values[i] = math.sin(i * innermult) * vol
     for i in range(calclength, sampleCount):
         values[i] = values[i % calclength]
-    
-    smoothLength = min(sampleCount // 2, int(SAMPLE_RATE * 0.005))#smooth five seconds at the wave ends to remove cracking
-    for i in range(0, smoothLength):
-        values[i] = int(values[i] * i / smoothLength)
-        values[-1 - i] = int(values[-1 - i] * i / smoothLength)
     return values
 
-INSTRUMENTS = {'sine':sineWave, 'square':squareWave, 'guitar':guitarWave}
+def sineWave(freq, sampleCount, vol, config=None):
+    """sineWave
+        freq - the frequency of the wave
+        sampleCount - the length of the wave in samples
+        vol - the volume between 0 and 1
+        config - the RenderConfig to render for"""
+    return FADE.apply(sineOscillator(freq, sampleCount, vol, config), config)
+
+curves = NoteCache(4 << 20) # envelope curves, see Envelope.curve
+
+class Envelope:
+    """Envelope - an attack/decay/sustain/release volume curve
+        Short notes get at most half of their length for the attack and for the release.
+        attack  - seconds to rise from silence to full volume
+        decay   - seconds to fall from full volume to the sustain level
+        sustain - the level (between 0 and 1) held until the release
+        release - seconds to fade to silence at the end of the note"""
+    def __init__(self, attack=0.0, decay=0.0, sustain=1.0, release=0.0):
+        self.shape = (attack, decay, sustain, release)
 
-def cachedWaveGen(freq, length, waveType, vol=1):
+    def segments(self, sampleCount, sampleRate):
+        """segments - returns the lengths in samples of attack, decay and release"""
+        attack, decay, sustain, release = self.shape
+        attack = min(int(sampleRate * attack), sampleCount // 2)
+        release = min(int(sampleRate * release), sampleCount // 2)
+        decay = max(0, min(int(sampleRate * decay), sampleCount - attack - release))
+        return attack, decay, release
+
+    def curve(self, sampleCount, sampleRate):
+        """curve - returns the gains of the attack and decay followed by the gains of the release
+            of a note, cached by shape and length; the samples in between get the sustain level"""
+        key = self.shape + (sampleCount, sampleRate)
+        gains = curves.get(key)
+        if gains is None:
+            attack, decay, release = self.segments(sampleCount, sampleRate)
+            sustain = self.shape[2]
+            if USE_NUMPY:
+                gains = numpy.concatenate((numpy.arange(attack) / float(attack or 1),
+                                           1 - (1 - sustain) * numpy.arange(decay) / float(decay or 1),
+                                           sustain * (numpy.arange(release - 1, -1, -1) / float(release or 1))))
+            else:
+                gains = [float(i) / attack for i in range(0, attack)]
+                gains += [1 - (1 - sustain) * i / decay for i in range(0, decay)]
+                gains += [sustain * (float(i) / release) for i in range(release - 1, -1, -1)]
+                gains = array.array('d', gains)
+            curves.put(key, gains)
+        return gains
+
+    def apply(self, values, config=None, sampleCount=None, first=0):
+        """apply - shape a note, changing it in place
+            values - a float wave (array or writable memoryview) or a numpy array of samples
+            sampleCount, first - shape values as samples [first, first + len(values))
+                    of a note of sampleCount samples (default: values is the whole note)
+            returns values"""
+        config = config or DEFAULT_CONFIG
+        if sampleCount is None:
+            sampleCount = len(values)
+        gains = self.curve(sampleCount, config.sampleRate)
+        attack, decay, release = self.segments(sampleCount, config.sampleRate)
+        head = attack + decay
+        tail = sampleCount - release
+        sustain = self.shape[2]
+        if USE_NUMPY and not isinstance(values, numpy.ndarray):
+            samples = numpy.frombuffer(values, dtype=numpy.float32)
+        else:
+            samples = values
+        # (note range, gains index - sample index); the middle only gets the sustain level
+        parts = [(0, head, 0), (tail, sampleCount, head - tail)]
+        if sustain != 1:
+            parts.append((head, tail, None))
+        for (a, b, shift) in parts:
+            a, b = max(a, first), min(b, first + len(values))
+            if a >= b:
+                continue
+            if USE_NUMPY:
+                samples[a - first:b - first] *= numpy.float64(sustain) if shift is None else gains[a + shift:b + shift]
+            elif shift is None:
+                values[a - first:b - first] = array.array(BUS_TYPECODE, [v * sustain for v in values[a - first:b - first]])
+            else:
+                values[a - first:b - first] = array.array(BUS_TYPECODE, [v * g for v, g in zip(values[a - first:b - first], gains[a + shift:b + shift])])
+        return values
+
+FADE = Envelope(attack=0.005, release=0.005) # just enough to remove cracking at the wave ends
+
+# Instruments with an oscillator play notes that are the start of any longer note
+# of the same frequency and volume, up to their envelope (None for no envelope).
+# cachedNoteParts keeps only the longest note of those and slices shorter ones from it.
+squareWave.oscillator = squareWave
+squareWave.envelope = None
+guitarWave.oscillator = guitarWave
+guitarWave.envelope = None
+sineWave.oscillator = sineOscillator
+sineWave.envelope = FADE
+
+class EnvelopedInstrument:
+    """EnvelopedInstrument - plays another instrument through an Envelope
+        instrument - an entry of INSTRUMENTS
+        envelope   - the Envelope to apply to every note"""
+    def __init__(self, instrument, envelope):
+        self.instrument = instrument
+        self.envelope = envelope
+        self.deterministic = getattr(instrument, 'deterministic', True)
+        if getattr(instrument, 'oscillator', None) and getattr(instrument, 'envelope', None) is None:
+            self.oscillator = instrument.oscillator
+        else:
+            self.oscillator = None
+
+    def __call__(self, freq, sampleCount, vol, config=None):
+        return self.envelope.apply(self.instrument(freq, sampleCount, vol, config), config)
+
+class WavetableInstrument:
+    """WavetableInstrument - plays a band-limited single cycle wave by walking a table
+        One table is built per octave, the first time a note of the octave is played,
+        and only contains the harmonics that stay below half the sample rate for every
+        note of that octave, so high notes do not alias.
+        harmonics - a function returning the amplitude of the k-th harmonic (k >= 1)
+        size      - samples per table
+        envelope  - the Envelope every note is played with"""
+    deterministic = True
+
+    def __init__(self, harmonics, size=2048, envelope=None):
+        self.harmonics = harmonics
+        self.size = size
+        self.envelope = envelope or FADE
+        self.tables = {} # (octave, sample rate) -> table of size + 1 floats between -1 and 1
+
+    def table(self, freq, sampleRate):
+        octave = int(math.floor(math.log(freq, 2)))
+        if (octave, sampleRate) not in self.tables:
+            size = self.size
+            count = max(1, min(size // 2 - 1, int(sampleRate / 2 / 2 ** (octave + 1))))
+            amplitudes = [(k, self.harmonics(k)) for k in range(1, count + 1)]
+            amplitudes = [(k, a) for (k, a) in amplitudes if a]
+            if USE_NUMPY:
+                phases = numpy.arange(size) * (2 * math.pi / size)
+                table = sum([a * numpy.sin(k * phases) for (k, a) in amplitudes])
+                table = list(table / numpy.abs(table).max())
+            else:
+                sines = [math.sin(2 * math.pi * i / size) for i in range(0, size)]
+                table = [0.0] * size
+                for (k, a) in amplitudes:
+                    for i in range(0, size):
+                        table[i] += a * sines[k * i % size]
+                peak = max([abs(v) for v in table])
+                table = [v / peak for v in table]
+            table.append(table[0]) # so interpolation never has to wrap
+            self.tables[octave, sampleRate] = numpy.array(table) if USE_NUMPY else table
+        return self.tables[octave, sampleRate]
+
+    def __call__(self, freq, sampleCount, vol, config=None):
+        return self.envelope.apply(self.oscillator(freq, sampleCount, vol, config), config)
+
+    def oscillator(self, freq, sampleCount, vol, config=None):
+        """oscillator - a note without the envelope"""
+        config = config or DEFAULT_CONFIG
+        table = self.table(freq, config.sampleRate)
+        size = self.size
+        step = float(freq) * size / config.sampleRate
+        if USE_NUMPY:
+            phases = numpy.arange(sampleCount) * step % size
+            index = phases.astype(numpy.int64)
+            frac = phases - index
+            return numpyToArray((table[index] + (table[index + 1] - table[index]) * frac) * vol)
+        values = initArray(sampleCount)
+        for i in range(0, sampleCount):
+            phase = i * step % size
+            index = int(phase)
+            a = table[index]
+            values[i] = (a + (table[index + 1] - a) * (phase - index)) * vol
+        return values
+
+NOTE_NAMES = {'C': 0, 'D': 2, 'E': 4, 'F': 5, 'G': 7, 'A': 9, 'B': 11}
+
+def noteFrequency(name):
+    """noteFrequency - returns the frequency of a note name like 'A4', 'C#3' or 'Bb2' (see FREQS), or None"""
+    match = re.match(r'^([A-Ga-g])([#b]?)(\d)$', name)
+    if not match:
+        return None
+    letter, accidental, octave = match.groups()
+    index = int(octave) * 12 + NOTE_NAMES[letter.upper()] + {'#': 1, 'b': -1, '': 0}[accidental]
+    return FREQS[index] if 0 <= index < len(FREQS) else None
+
+def readSample(filename):
+    """readSample - reads a wav file for SamplerInstrument
+        The file is memory mapped; 16 and 32 bit mono files are used right from the
+        map, other ones are converted (mixed down to mono) once.
+        returns (samples, scale, sampleRate): samples * scale are between -1 and 1"""
+    f = wave.open(filename, 'r', mapped=True)
+    channels, width, rate, frames, comptype, compname = f.getparams()
+    raw = f.readframes(frames)
+    f.close()
+    if comptype == 'FLOAT':
+        typecode, scale = ('f' if width == 4 else 'd'), 1.0
+    else:
+        typecode, scale = FMT[width], 1.0 / (1 << (width * 8 - 1))
+    if USE_NUMPY:
+        if width == 3:
+            packed = numpy.frombuffer(raw, dtype=numpy.uint8).reshape(-1, 3).astype(numpy.int32)
+            samples = packed[:, 0] | packed[:, 1] << 8 | packed[:, 2] << 16
+            samples = numpy.where(samples & 0x800000, samples - 0x1000000, samples)
+        elif width == 1:
+            samples = numpy.frombuffer(raw, dtype=numpy.uint8).astype(numpy.int16) - 128 # 8 bit wav is unsigned
+        else:
+            samples = numpy.frombuffer(raw, dtype=typecode)
+        if channels > 1:
+            samples = samples.reshape(-1, channels).mean(axis=1)
+        return samples, scale, rate
+    if width == 3:
+        samples = [int.from_bytes(raw[i:i + 3], 'little', signed=True) for i in range(0, len(raw) - 2, 3)]
+    elif width == 1:
+        samples = [n - 128 for n in bytearray(raw)]
+    else:
+        samples = array.array(typecode)
+        samples.frombytes(raw)
+    if channels > 1:
+        samples = [float(sum(samples[i:i + channels])) / channels for i in range(0, len(samples) - channels + 1, channels)]
+    return samples, scale, rate
+
+class SamplerInstrument:
+    """SamplerInstrument - plays recordings (wav files) of notes
+        Every note is resampled from the recording with the nearest root note, played once
+        and then silent. Notes are cached (and sliced for shorter durations) like oscillators.
+        samples  - {root frequency: wav file name}, the files are read when first played
+        envelope - the Envelope every note is played with
+        cacheKey identifies the sample files (names, sizes and times), see instrumentKey"""
+    deterministic = True
+
+    def __init__(self, samples, envelope=None):
+        self.files = dict(samples)
+        self.roots = sorted(self.files)
+        if not self.roots:
+            raise ValueError('a sampler needs at least one sample')
+        self.envelope = envelope or FADE
+        self.samples = {} # root -> (samples, scale, sample rate), see readSample
+        files = []
+        for root in self.roots:
+            stat = os.stat(self.files[root])
+            files.append((root, os.path.abspath(self.files[root]), stat.st_size, stat.st_mtime))
+        self.cacheKey = (hashlib.sha1(repr((files, self.envelope.shape)).encode()).hexdigest()[:20],)
+
+    @staticmethod
+    def fromDirectory(directory, envelope=None):
+        """fromDirectory - a sampler of the wav files in directory, named after their root note
+            ('A4.wav', 'C#3.wav') or its frequency ('440.wav')"""
+        samples = {}
+        for filename in sorted(os.listdir(directory)):
+            name, ext = os.path.splitext(filename)
+            if ext.lower() != '.wav':
+                continue
+            freq = noteFrequency(name)
+            if freq is None:
+                try:
+                    freq = float(name)
+                except ValueError:
+                    continue
+            samples[freq] = os.path.join(directory, filename)
+        if not samples:
+            raise ValueError('no samples named after their note in %r' % (directory,))
+        return SamplerInstrument(samples, envelope)
+
+    def sample(self, root):
+        if root not in self.samples:
+            self.samples[root] = readSample(self.files[root])
+        return self.samples[root]
+
+    def __call__(self, freq, sampleCount, vol, config=None):
+        return self.envelope.apply(self.oscillator(freq, sampleCount, vol, config), config)
+
+    def oscillator(self, freq, sampleCount, vol, config=None):
+        """oscillator - a note without the envelope"""
+        config = config or DEFAULT_CONFIG
+        root = min(self.roots, key=lambda r: abs(math.log(float(freq) / r)))
+        samples, scale, rate = self.sample(root)
+        step = float(freq) / root * rate / config.sampleRate
+        last = len(samples) - 1
+        count = min(sampleCount, int(math.ceil(last / step))) if last > 0 else 0 # where position < last
+        mult = scale * vol
+        if USE_NUMPY:
+            values = numpy.zeros(sampleCount)
+            positions = numpy.arange(count) * step
+            index = numpy.minimum(positions.astype(numpy.int64), last - 1)
+            a = samples[index].astype(numpy.float64)
+            values[:count] = (a + (samples[index + 1] - a) * (positions - index)) * mult
+            return numpyToArray(values)
+        values = initArray(sampleCount)
+        for i in range(0, count):
+            position = i * step
+            index = min(int(position), last - 1)
+            a = samples[index]
+            values[i] = (a + (samples[index + 1] - a) * (position - index)) * mult
+        return values
+
+INSTRUMENTS = {'sine':sineWave, 'square':squareWave, 'guitar':guitarWave,
+               'tablesquare':WavetableInstrument(lambda k: k % 2 and 1.0 / k),
+               'tablesaw':WavetableInstrument(lambda k: (-1) ** (k + 1) / float(k)),
+               'softsquare':EnvelopedInstrument(squareWave, Envelope(attack=0.01, decay=0.1, sustain=0.6, release=0.05))}
+
+def instrumentKey(waveType):
+    """instrumentKey - what the notes of an instrument depend on besides their parameters and
+        the config, for cache keys: the cacheKey tuple of instruments that have one (like
+        the sample files of a sampler), else ()"""
+    return getattr(INSTRUMENTS[waveType], 'cacheKey', ())
+
+samplesdir = None
+
+def useSamples(directory):
+    """useSamples - play the 'sampler' instrument from the wav files in directory (None to remove it)
+        see SamplerInstrument.fromDirectory"""
+    global samplesdir
+    sampler = SamplerInstrument.fromDirectory(directory) if directory else None
+    old = INSTRUMENTS.get('sampler')
+    if old is not None and (sampler is None or sampler.cacheKey != old.cacheKey):
+        # the notes of the old samples are never played again
+        cache.discard(lambda key: key[0] == 'sampler' or key[:2] == ('prefix', 'sampler'))
+    samplesdir = directory
+    if sampler is not None:
+        INSTRUMENTS['sampler'] = sampler
+    else:
+        INSTRUMENTS.pop('sampler', None)
+
+def lengthToSamples(length, config=None):
+    """lengthToSamples - returns the number of samples a note of length milliseconds takes"""
+    return ((config or DEFAULT_CONFIG).sampleRate * length) // 1000
+
+def cachedWaveGen(freq, length, waveType, vol=1, sampleCount=None, config=None):
     """cachedWaveGen
         note - the wave
         length - the length to play the wave for in milliseconds
         waveType - what kind of wave to make. This is a string.
-        returns a string representing an 8 bit mono wave"""
-    sampleCount = (SAMPLE_RATE * length) // 1000
-    instrument = INSTRUMENTS.get(waveType, INSTRUMENTS.get(DEFAULT_INSTRUMENT))
-    cachekey = (instrument, freq, sampleCount)
-    if(cachekey not in cache):
-        cache[cachekey] = instrument(freq, sampleCount, vol)
-    return cache[cachekey]
+        vol - the volume between 0 and 1
+        sampleCount - the exact length in samples, overrides length
+        config - the RenderConfig to render for (default: DEFAULT_CONFIG)
+        returns a float wave"""
+    config = config or DEFAULT_CONFIG
+    if sampleCount is None:
+        sampleCount = lengthToSamples(length, config)
+    values, envelope = cachedNoteParts(freq, waveType, vol, sampleCount, config)
+    if envelope is None:
+        return values
+    note = initArray(0)
+    note.frombytes(values.cast('B'))
+    return envelope.apply(note, config)
+
+def cachedNoteParts(freq, waveType, vol, sampleCount, config=None):
+    """cachedNoteParts - returns a note as (wave, envelope still to apply to it)
+        Notes of deterministic instruments with an oscillator are zero-copy slices of the
+        longest note of the same frequency and volume so far (which is kept in the disk
+        cache too), with the instrument's envelope (see squareWave.oscillator); all other
+        notes are finished, with None."""
+    config = config or DEFAULT_CONFIG
+    if waveType not in INSTRUMENTS:
+        waveType = DEFAULT_INSTRUMENT
+    instrument = INSTRUMENTS[waveType]
+    cachekey = (waveType, freq, sampleCount, vol) + config.key() + instrumentKey(waveType)
+    values = bank.get(cachekey) if bank is not None else None
+    if values is not None:
+        return values, None
+    oscillator = getattr(instrument, 'oscillator', None)
+    if oscillator and getattr(instrument, 'deterministic', True):
+        prefixkey = ('prefix', waveType, freq, vol) + config.key() + instrumentKey(waveType)
+        values = cache.get(prefixkey)
+        if (values is None or len(values) < sampleCount) and diskcache is not None:
+            values = diskcache.get(prefixkey)
+            if values is not None and len(values) >= sampleCount:
+                cache.put(prefixkey, values)
+        if values is None or len(values) < sampleCount:
+            values = oscillator(freq, sampleCount, vol, config)
+            if diskcache is not None:
+                diskcache.put(prefixkey, values) # replaces a shorter note
+            cache.put(prefixkey, values)
+        return memoryview(values)[:sampleCount], instrument.envelope
+    values = cache.get(cachekey)
+    if values is None:
+        # instruments that use random numbers would sound the same in every song
+        ondisk = diskcache is not None and getattr(instrument, 'deterministic', True)
+        if ondisk:
+            values = diskcache.get(cachekey)
+        if values is None:
+            values = instrument(freq, sampleCount, vol, config)
+            if ondisk:
+                diskcache.put(cachekey, values)
+        cache.put(cachekey, values)
+    return values, None
+
+BANK_TICKS = (1, 2, 4, 8, 16) # the note lengths, in ticks, songs use most
+
+def bankNotes(waveTypes, ticktime, freqs=FREQS, ticks=BANK_TICKS, vols=(1,), config=None):
+    """bankNotes - returns the notes worth putting into a bank, for buildBank
+        A note of k ticks starts on a whole sample, so it can be one sample longer
+        or shorter than k ticks; both lengths are included.
+        waveTypes - the instruments (instruments that use random numbers are left out)
+        ticktime  - the time each tick takes, in milliseconds
+        freqs     - the frequencies, ticks - the note lengths in ticks
+        vols      - the volumes notes are played with
+        config    - the RenderConfig to render for"""
+    config = config or DEFAULT_CONFIG
+    counts = set()
+    for tick in ticks:
+        exact = tick * ticktime * config.sampleRate / 1000.0
+        counts.update([int(math.floor(exact)), int(math.ceil(exact))])
+    return [(waveType, freq, sampleCount, vol) for waveType in waveTypes
+            if getattr(INSTRUMENTS[waveType], 'deterministic', True)
+            for freq in freqs for sampleCount in sorted(counts) for vol in vols]
+
+def buildBank(filename, notes, config=None, progress=None):
+    """buildBank - render notes into a bank file, see NoteBank and useBank
+        filename - the file to write
+        notes    - (waveType, freq, sampleCount, vol) tuples, see bankNotes
+        config   - the RenderConfig to render for
+        progress - called with the fraction done after every note"""
+    config = config or DEFAULT_CONFIG
+    notes = sorted(set(notes))
+    for note in notes:
+        if not getattr(INSTRUMENTS[note[0]], 'deterministic', True):
+            raise ValueError('%s uses random numbers and cannot be banked' % (note[0],))
+    entries = []
+    offset = 0
+    for note in notes:
+        entries.append(list(note) + list(config.key()) + list(instrumentKey(note[0])) + [offset])
+        offset += note[2]
+    index = json.dumps({'version': ENGINE_VERSION, 'byteorder': sys.byteorder, 'notes': entries}).encode('utf-8')
+    tmppath = '%s.%d.tmp' % (filename, os.getpid())
+    with open(tmppath, 'wb') as f:
+        f.write(BANK_MAGIC + struct.pack('<I', len(index)) + index)
+        f.write(bytes(bankDataStart(len(index)) - f.tell()))
+        for i, (waveType, freq, sampleCount, vol) in enumerate(notes):
+            f.write(INSTRUMENTS[waveType](freq, sampleCount, vol, config))
+            if progress: progress(float(i + 1) / len(notes))
+    os.rename(tmppath, filename)
     
-def limit(n):
-    if (n > MAX):
-        return MAX
-    elif (n < -MAX):
-        return -MAX
+def limit(n, maxValue=1.0):
+    if (n > maxValue):
+        return maxValue
+    elif (n < -maxValue):
+        return -maxValue
     return n
 
-def mergeWaves(waves):
+def mergeWaves(waves, gains=None, clip='hard'):
     """mergeWaves - merge waves together
-        returns a new wave that is all combined"""
-    l = max([len(wave) for wave in waves])
-    outwave = initArray(l)
-    for wave in waves:
-        for i in range(0,len(wave)):
-            outwave[i]=outwave[i]+wave[i]
-    return outwave
+        waves - a list of float waves (arrays or memoryviews), may have different lengths
+        gains - a list with a volume factor per wave (default: all 1)
+        clip  - what to do with sums beyond full scale (1): 'hard' cuts them off,
+                'soft' squashes the whole mix with tanh so it approaches
+                full scale smoothly, None leaves them for the Quantizer to clip
+        returns a new float wave that is all combined"""
+    l = max([len(wave) for wave in waves] or [0])
+    if gains is None:
+        gains = [1] * len(waves)
+    if USE_NUMPY:
+        outwave = numpy.zeros(l, dtype=numpy.float32)
+        for wave, gain in zip(waves, gains):
+            samples = numpy.frombuffer(wave, dtype=numpy.float32)
+            outwave[:len(samples)] += samples if gain == 1 else samples * numpy.float32(gain)
+        if clip == 'hard':
+            numpy.clip(outwave, -1, 1, out=outwave)
+        elif clip == 'soft':
+            numpy.tanh(outwave, out=outwave)
+        return numpyToArray(outwave)
+    outwave = [0.0] * l
+    for wave, gain in zip(waves, gains):
+        if gain == 1:
+            outwave[:len(wave)] = [a + b for a, b in zip(outwave, wave)]
+        else:
+            outwave[:len(wave)] = [a + b * gain for a, b in zip(outwave, wave)]
+    if clip == 'hard':
+        outwave = [limit(n) for n in outwave]
+    elif clip == 'soft':
+        outwave = [math.tanh(n) for n in outwave]
+    return array.array(BUS_TYPECODE, outwave)
     
 def initArray(size=0):
-    return array.array(FMT[SAMPLE_WIDTH], [0] * size)    
+    return array.array(BUS_TYPECODE, bytes(size * BUS_ITEMSIZE))
+
+def numpyToArray(values):
+    """numpyToArray - convert a numpy array to a float wave"""
+    out = initArray(0)
+    out.frombytes(values.astype(numpy.float32).tobytes())
+    return out
+
+QUANTIZE_BLOCK = 1 << 18 # samples Quantizer.blocks quantizes at a time
+
+class Quantizer:
+    """Quantizer - turns float waves into the frames of a wav file
+        This is the one place where samples become ints: they are scaled to the
+        sample width, TPDF dithered (two random numbers, +-1 step), rounded and clipped.
+        Frames are unsigned for 8 bit, packed for 24 bit and copied to every channel.
+        A floating config gets the floats as they are, without any of that.
+        The dither noise continues from one write to the next, so quantize a whole
+        song with one Quantizer. See blocks for quantizing long waves.
+        config - the RenderConfig to write
+        seed   - seed of the dither noise, the same seed gives the same file"""
+    def __init__(self, config=None, seed=0):
+        self.config = config or DEFAULT_CONFIG
+        if USE_NUMPY:
+            self.random = numpy.random.default_rng(seed)
+        else:
+            self.random = random.Random(seed)
+
+    def quantize(self, data):
+        """quantize - returns the samples of a float wave as ints of the config's sample width
+            (a numpy array with NumPy, else a wave array)"""
+        config = self.config
+        top = config.max
+        if USE_NUMPY:
+            # float32 is exact enough under the dither noise up to 16 bit; without dither,
+            # float64 rounds exactly like the pure-Python loop
+            dtype = numpy.float32 if config.sampleWidth <= 2 and config.dither else numpy.float64
+            samples = numpy.frombuffer(data, dtype=numpy.float32).astype(dtype)
+            samples *= top
+            if config.dither:
+                noise = self.random.random((len(samples), 2), dtype=dtype) # drawn per sample, so any block size gives the same noise
+                samples += noise[:, 0]
+                samples -= noise[:, 1]
+            samples += 0.5 # round half up, like floor(n + 0.5) below
+            numpy.floor(samples, out=samples)
+            numpy.clip(samples, -top, top, out=samples)
+            return samples.astype(config.typecode)
+        if config.dither:
+            noise = self.random.random
+            return array.array(config.typecode, [int(limit(math.floor(n * top + noise() - noise() + 0.5), top)) for n in data])
+        return array.array(config.typecode, [int(limit(math.floor(n * top + 0.5), top)) for n in data])
+
+    def frames(self, data):
+        """frames - returns the wav frames of a float wave as bytes"""
+        config = self.config
+        if not config.floating:
+            samples = self.quantize(data)
+        elif USE_NUMPY:
+            samples = numpy.frombuffer(data, dtype=numpy.float32)
+        else:
+            samples = initArray(0)
+            samples.frombytes(memoryview(data).cast('B'))
+        if USE_NUMPY:
+            if config.channels > 1:
+                samples = numpy.repeat(samples, config.channels)
+            if config.sampleWidth == 1:
+                return (samples.astype(numpy.int16) + 128).astype(numpy.uint8).tobytes()
+            if config.sampleWidth == 3:
+                low = 0 if sys.byteorder == 'little' else 1 # the three low bytes of every int
+                return samples.view(numpy.uint8).reshape(-1, 4)[:, low:low + 3].tobytes()
+            return samples.tobytes()
+        if config.channels > 1:
+            frames = array.array(config.typecode, bytes(len(samples) * config.channels * config.itemsize))
+            for channel in range(0, config.channels):
+                frames[channel::config.channels] = samples
+            samples = frames
+        if config.sampleWidth == 1:
+            return array.array('B', [n + 128 for n in samples]).tobytes()
+        if config.sampleWidth == 3:
+            raw = samples.tobytes()
+            low = 0 if sys.byteorder == 'little' else 1
+            packed = bytearray(len(samples) * 3)
+            for i in range(0, 3):
+                packed[i::3] = raw[low + i::4]
+            return bytes(packed)
+        return samples.tobytes()
+
+    def blocks(self, data):
+        """blocks - yields the wav frames of a float wave QUANTIZE_BLOCK samples at a time,
+            so a long wave never needs more than a block of temporary arrays"""
+        data = memoryview(data)
+        for i in range(0, len(data), QUANTIZE_BLOCK):
+            yield self.frames(data[i:i + QUANTIZE_BLOCK])
+
+WAV_BUFFER = 1 << 20 # bytes collected before a wav file is written to, the header is only written at the end
+
+class WavWriter:
+    """WavWriter - a wav file float waves can be appended to, see openWavFile"""
+    def __init__(self, filename, config=None, frames=0):
+        config = self.config = config or DEFAULT_CONFIG
+        self.quantizer = Quantizer(config)
+        self.f = wave.open(filename, 'w', WAV_BUFFER)
+        comptype = ('FLOAT', 'IEEE float') if config.floating else ('NONE', 'not compressed')
+        #f.setparams((nchannels, sampwidth, framerate, nframes, comptype, compname))
+        self.f.setparams((config.channels, config.sampleWidth, config.sampleRate, frames) + comptype)
+        if not frames:
+            self.f.setrf64() # the length is unknown, keep room for sizes beyond 4 GB
 
-def makeWavFile(data, filename):
+    def write(self, data):
+        """write - quantize a float wave and append it to the file"""
+        for frames in self.quantizer.blocks(data):
+            self.f.writeframes(frames)
+
+    def close(self):
+        self.f.close()
+
+def openWavFile(filename, config=None, frames=0):
+    """openWavFile
+        filename - the name of the file to open
+        config - the RenderConfig of the file
+        frames - how many samples will be written, if known (saves patching the header)
+        returns a WavWriter, call write() on it as often as needed"""
+    return WavWriter(filename, config, frames)
+
+def makeWavFile(data, filename, config=None):
     """makeWave
-        data - the wave to put into the file
-        filename - the name of the file to open"""
-    f = wave.open(filename, 'w')
-    #f.setparams((nchannels, sampwidth, framerate, nframes, comptype, compname))
-    f.setparams((1, SAMPLE_WIDTH, SAMPLE_RATE, 0, 'NONE', 'not compressed'))
-    f.writeframes(data)
+        data - the float wave to put into the file
+        filename - the name of the file to open
+        config - the RenderConfig of the file"""
+    f = openWavFile(filename, config, len(data))
+    f.write(data)
     f.close()
-    
-    
-''' int smoothLength = (int) (SAMPLE_RATE * 0.005);
-        end--;
-        for (int i = 0; i < smoothLength && i < end / 2; i++) {
-            data[start + i] = (byte) (data[start + i] * i / smoothLength);
-            data[end - i] = (byte) (data[end - i] * i / smoothLength);
-        }'''
+
+class PcmWriter:
+    """PcmWriter - writes float waves as raw frames (no header) to a binary file object,
+        e.g. the stdin of an encoder
+        out - the file object, closed by close()
+        config - the RenderConfig of the frames"""
+    def __init__(self, out, config=None):
+        self.out = out
+        self.config = config or DEFAULT_CONFIG
+        self.quantizer = Quantizer(self.config)
+
+    def write(self, data):
+        """write - quantize a float wave and write its frames"""
+        for frames in self.quantizer.blocks(data):
+            self.out.write(frames)
+
+    def close(self):
+        self.out.close()
+
+class LiveSink:
+    """LiveSink - plays waves in real time into a pipe or file descriptor, e.g. stdout piped into a player
+        Writing blocks until the player needs more, so the renderer never runs more than
+        latency seconds ahead. If the renderer falls behind real time the player runs dry:
+        that is counted as an underrun and the clock restarts from the late block.
+        out - a binary file object or a file descriptor
+        config - the RenderConfig to play (float waves are quantized to it)
+        latency - how many seconds of audio may be buffered ahead of the player"""
+    def __init__(self, out, config=None, latency=0.2):
+        self.out = out
+        self.config = config or DEFAULT_CONFIG
+        self.latency = latency
+        self.quantizer = Quantizer(self.config)
+        self.started = None # when the player started the first sample (after the last underrun)
+        self.written = 0.0 # seconds written since then
+        self.underruns = 0
+        self.lag = 0.0 # total seconds the player went without data
+
+    def write(self, data):
+        """write - write a wave, waiting until it is due"""
+        now = time.time()
+        if self.started is None:
+            self.started = now
+        elif now - self.started > self.written:
+            self.underruns += 1
+            self.lag += now - self.started - self.written
+            self.started = now - self.written
+        frames = self.quantizer.frames(data)
+        if isinstance(self.out, int):
+            view = memoryview(frames).cast('B')
+            while len(view):
+                view = view[os.write(self.out, view):]
+        else:
+            self.out.write(frames)
+            self.out.flush()
+        self.written += float(len(data)) / self.config.sampleRate
+        ahead = self.written - (time.time() - self.started)
+        if ahead > self.latency:
+            time.sleep(ahead - self.latency)
+
+def planLength(plan):
+    """planLength - returns the length in samples of a track plan"""
+    if not plan:
+        return 0
+    offset, sampleCount, freq = plan[-1]
+    return offset + sampleCount
+
+def renderTrack(plan, waveType, vol=1, out=None, start=0, end=None, progress=None, config=None, offsets=None):
+    """renderTrack - render (a part of) a track, copying every note into place exactly once
+        plan - a list of (offset, sampleCount, freq) tuples sorted by offset,
+                the sample position and length of every note
+        waveType - the instrument to use
+        vol - the volume between 0 and 1
+        out - a writable, zeroed memoryview of float samples to render into,
+                at least end - start long (default: a new wave array)
+        start, end - the range of samples to render (default: the whole track)
+        progress - called after every note
+        config - the RenderConfig to render for
+        offsets - the offsets of the notes of plan, if the caller keeps them (saves making the list)
+        returns out"""
+    if end is None:
+        end = planLength(plan)
+    if out is None:
+        out = initArray(end - start)
+    view = memoryview(out)
+    if offsets is None:
+        offsets = [note[0] for note in plan]
+    first = max(0, bisect.bisect_right(offsets, start) - 1)
+    for i in range(first, len(plan)):
+        offset, sampleCount, freq = plan[i]
+        if offset >= end:
+            break
+        if offset + sampleCount > start and sampleCount > 0:
+            wave, envelope = cachedNoteParts(freq, waveType, vol, sampleCount, config)
+            wave = memoryview(wave)
+            a = max(start, offset)
+            b = min(end, offset + sampleCount)
+            view[a - start:b - start] = wave[a - offset:b - offset]
+            if envelope is not None:
+                envelope.apply(view[a - start:b - start], config, sampleCount, a - offset)
+        if progress: progress()
+    return out
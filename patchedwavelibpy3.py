@@ -15,7 +15,8 @@ This returns an instance of a class with the following public methods:
       getsampwidth()  -- returns sample width in bytes
       getframerate()  -- returns sampling frequency
       getnframes()    -- returns number of audio frames
-      getcomptype()   -- returns compression type ('NONE' for linear samples)
+      getcomptype()   -- returns compression type ('NONE' for linear samples,
+                         'FLOAT' for IEEE floating point samples)
       getcompname()   -- returns human-readable version of
                          compression type ('not compressed' linear samples)
       getparams()     -- returns a tuple consisting of all of the
@@ -35,6 +36,13 @@ file.
 The close() method is called automatically when the class instance
 is destroyed.
 
+      f = wave.open(file, 'r', mapped=True)
+memory maps the file (which must be a file name or a real file) and
+readframes() returns memoryview slices of the data chunk instead of
+reading copies of it; setpos() costs nothing. The slices stay valid after
+close(). On big-endian machines samples wider than one byte are still
+copied, to swap their bytes.
+
 Writing WAVE files:
       f = wave.open(file, 'w')
 where file is either the name of a file or an open file pointer.
@@ -57,21 +65,40 @@ This returns an instance of a class with the following public methods:
                          file header
       writeframes(data)
                       -- write audio frames and patch up the file header
+      setrf64()       -- reserve room for an RF64 header, so the file
+                         may grow beyond 4 GB
       close()         -- patch up the file header and close the
                          output file
 You should set the parameters before the first writeframesraw or
 writeframes.  The total number of frames does not need to be set,
 but when it is set to the correct value, the header does not have to
 be patched up.
+Samples are 8 (unsigned), 16, 24 or 32 bit integers, or with the
+compression type 'FLOAT' 32 or 64 bit IEEE floats.
+RIFF sizes end at 4 GB: files that may grow beyond that need setrf64()
+(or setnframes() with their real size) before the first frames are
+written. They get a JUNK chunk, which turns into a ds64 chunk and the
+file into an RF64 file when it grows too large for RIFF.
 It is best to first set all parameters, perhaps possibly the
 compression type, and then write audio frames using writeframesraw.
 When all frames have been written, either call writeframes('') or
 close() to patch up the sizes in the header.
 The close() method is called automatically when the class instance
 is destroyed.
+
+Streaming WAVE files:
+      f = wave.open(file, 'w', buffersize)
+with buffersize > 0 collects the frames of writeframes() and
+writeframesraw() in a buffer of about buffersize bytes and only writes
+it when it is full; data at least that large is written straight away.
+The header is patched up once, by close(), so writing a file in many
+small pieces costs about as much as writing it at once.
+writeframes() and writeframesraw() take bytes or any other object with
+the buffer protocol (e.g. an array), without copying it first.
 """
 
 import builtins
+import mmap as _mmap
 
 __all__ = ["open", "openfp", "Error"]
 
@@ -79,8 +106,13 @@ class Error(Exception):
     pass
 
 WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
 
-_array_fmts = None, 'b', 'h', None, 'l'
+_array_fmts = None, 'b', 'h', None, 'i', None, None, None, 'd'
+
+_RIFF_LIMIT = 0xFFFFFFFF # larger sizes are only stored in the ds64 chunk of an RF64 file
+_DS64_SIZE = 28 # riff size, data size and sample count (64 bit each), table length
 
 # Determine endian-ness
 import struct
@@ -91,6 +123,21 @@ else:
 
 from chunk import Chunk
 
+def _byteswap(data, sampwidth):
+    """returns data (little endian samples) with the bytes of every sample reversed"""
+    if sampwidth == 3:
+        data = bytes(data)
+        swapped = bytearray(len(data))
+        swapped[0::3] = data[2::3]
+        swapped[1::3] = data[1::3]
+        swapped[2::3] = data[0::3]
+        return bytes(swapped)
+    import array
+    swapped = array.array(_array_fmts[sampwidth])
+    swapped.frombytes(data)
+    swapped.byteswap()
+    return swapped.tobytes()
+
 class Wave_read:
     """Variables used in this class:
 
@@ -120,18 +167,21 @@ class Wave_read:
               file for readframes()
     _data_chunk -- instantiation of a chunk class for the DATA chunk
     _framesize -- size of one frame in the file
+    _data -- a memoryview of the DATA chunk in mapped mode, else None
     """
 
-    def initfp(self, file):
+    def initfp(self, file, mapped=False):
         self._convert = None
+        self._data = None
         self._soundpos = 0
         self._file = Chunk(file, bigendian = 0)
-        if self._file.getname() != b'RIFF':
+        if self._file.getname() not in (b'RIFF', b'RF64'):
             raise Error('file does not start with RIFF id')
         if self._file.read(4) != b'WAVE':
             raise Error('not a WAVE file')
         self._fmt_chunk_read = 0
         self._data_chunk = None
+        ds64 = None
         while 1:
             self._data_seek_needed = 1
             try:
@@ -139,28 +189,38 @@ class Wave_read:
             except EOFError:
                 break
             chunkname = chunk.getname()
-            if chunkname == b'fmt ':
+            if chunkname == b'ds64' and self._file.getname() == b'RF64':
+                ds64 = struct.unpack_from('<QQ', chunk.read(16))
+                self._file.chunksize = ds64[0]
+            elif chunkname == b'fmt ':
                 self._read_fmt_chunk(chunk)
                 self._fmt_chunk_read = 1
             elif chunkname == b'data':
                 if not self._fmt_chunk_read:
                     raise Error('data chunk before fmt chunk')
                 self._data_chunk = chunk
+                if ds64 and chunk.chunksize == _RIFF_LIMIT:
+                    chunk.chunksize = ds64[1]
                 self._nframes = chunk.chunksize // self._framesize
                 self._data_seek_needed = 0
                 break
             chunk.skip()
         if not self._fmt_chunk_read or not self._data_chunk:
             raise Error('fmt chunk and/or data chunk missing')
+        if mapped:
+            start = self._file.offset + self._data_chunk.offset
+            data = memoryview(_mmap.mmap(file.fileno(), 0, access=_mmap.ACCESS_READ))
+            self._data = data[start:start + self._data_chunk.chunksize]
+            self._nframes = len(self._data) // self._framesize # a truncated file has fewer frames
 
-    def __init__(self, f):
+    def __init__(self, f, mapped=False):
         self._i_opened_the_file = None
         if isinstance(f, str):
             f = builtins.open(f, 'rb')
             self._i_opened_the_file = f
         # else, assume it is an open file object already
         try:
-            self.initfp(f)
+            self.initfp(f, mapped)
         except:
             if self._i_opened_the_file:
                 f.close()
@@ -183,6 +243,7 @@ class Wave_read:
             self._i_opened_the_file.close()
             self._i_opened_the_file = None
         self._file = None
+        self._data = None # the map is closed when the last slice is gone
 
     def tell(self):
         return self._soundpos
@@ -223,6 +284,8 @@ class Wave_read:
         self._data_seek_needed = 1
 
     def readframes(self, nframes):
+        if self._data is not None:
+            return self._readmapped(nframes)
         if self._data_seek_needed:
             self._data_chunk.seek(0, 0)
             pos = self._soundpos * self._framesize
@@ -231,26 +294,9 @@ class Wave_read:
             self._data_seek_needed = 0
         if nframes == 0:
             return b''
+        data = self._data_chunk.read(nframes * self._framesize)
         if self._sampwidth > 1 and big_endian:
-            # unfortunately the fromfile() method does not take
-            # something that only looks like a file object, so
-            # we have to reach into the innards of the chunk object
-            import array
-            chunk = self._data_chunk
-            data = array.array(_array_fmts[self._sampwidth])
-            nitems = nframes * self._nchannels
-            if nitems * self._sampwidth > chunk.chunksize - chunk.size_read:
-                nitems = (chunk.chunksize - chunk.size_read) // self._sampwidth
-            data.fromfile(chunk.file.file, nitems)
-            # "tell" data chunk how much was read
-            chunk.size_read = chunk.size_read + nitems * self._sampwidth
-            # do the same for the outermost chunk
-            chunk = chunk.file
-            chunk.size_read = chunk.size_read + nitems * self._sampwidth
-            data.byteswap()
-            data = data.tobytes()
-        else:
-            data = self._data_chunk.read(nframes * self._framesize)
+            data = _byteswap(data, self._sampwidth)
         if self._convert and data:
             data = self._convert(data)
         self._soundpos = self._soundpos + len(data) // (self._nchannels * self._sampwidth)
@@ -260,16 +306,33 @@ class Wave_read:
     # Internal methods.
     #
 
+    def _readmapped(self, nframes):
+        nframes = max(0, min(nframes, self._nframes - self._soundpos))
+        pos = self._soundpos * self._framesize
+        data = self._data[pos:pos + nframes * self._framesize]
+        if self._sampwidth > 1 and big_endian:
+            data = _byteswap(data, self._sampwidth)
+        if self._convert and data:
+            data = self._convert(data)
+        self._soundpos = self._soundpos + nframes
+        return data
+
     def _read_fmt_chunk(self, chunk):
-        wFormatTag, self._nchannels, self._framerate, dwAvgBytesPerSec, wBlockAlign = struct.unpack_from('<hhllh', chunk.read(14))
+        wFormatTag, self._nchannels, self._framerate, dwAvgBytesPerSec, wBlockAlign = struct.unpack_from('<HHLLH', chunk.read(14))
+        sampwidth = struct.unpack_from('<H', chunk.read(2))[0]
+        if wFormatTag == WAVE_FORMAT_EXTENSIBLE:
+            # cbSize, valid bits, channel mask, then a GUID starting with the real format
+            wFormatTag = struct.unpack_from('<8xH', chunk.read(10))[0]
         if wFormatTag == WAVE_FORMAT_PCM:
-            sampwidth = struct.unpack_from('<h', chunk.read(2))[0]
-            self._sampwidth = (sampwidth + 7) // 8
+            self._comptype = 'NONE'
+            self._compname = 'not compressed'
+        elif wFormatTag == WAVE_FORMAT_IEEE_FLOAT and sampwidth in (32, 64):
+            self._comptype = 'FLOAT'
+            self._compname = 'IEEE float'
         else:
             raise Error('unknown format: %r' % (wFormatTag,))
+        self._sampwidth = (sampwidth + 7) // 8
         self._framesize = self._nchannels * self._sampwidth
-        self._comptype = 'NONE'
-        self._compname = 'not compressed'
 
 class Wave_write:
     """Variables used in this class:
@@ -295,22 +358,29 @@ class Wave_write:
     _datalength -- the size of the audio samples written to the header
     _nframeswritten -- the number of frames actually written
     _datawritten -- the size of the audio samples actually written
+              (including the buffer)
+    _buffersize -- the size of the write buffer, 0 for no buffering
+    _buffer -- frames not written to the file yet (streaming mode)
+    _rf64 -- whether room for a ds64 chunk is reserved (setrf64())
+    _headersize -- the size of the header, everything before the samples
     """
 
-    def __init__(self, f):
+    def __init__(self, f, buffersize=0):
         self._i_opened_the_file = None
         if isinstance(f, str):
             f = builtins.open(f, 'wb')
             self._i_opened_the_file = f
         try:
-            self.initfp(f)
+            self.initfp(f, buffersize)
         except:
             if self._i_opened_the_file:
                 f.close()
             raise
 
-    def initfp(self, file):
+    def initfp(self, file, buffersize=0):
         self._file = file
+        self._buffersize = buffersize
+        self._buffer = bytearray()
         self._convert = None
         self._nchannels = 0
         self._sampwidth = 0
@@ -320,6 +390,9 @@ class Wave_write:
         self._datawritten = 0
         self._datalength = 0
         self._headerwritten = False
+        self._rf64 = False
+        self._comptype = 'NONE'
+        self._compname = 'not compressed'
 
     def __del__(self):
         self.close()
@@ -342,7 +415,7 @@ class Wave_write:
     def setsampwidth(self, sampwidth):
         if self._datawritten:
             raise Error('cannot change parameters after starting to write')
-        if sampwidth < 1 or sampwidth > 4:
+        if sampwidth not in (1, 2, 3, 4, 8):
             raise Error('bad sample width')
         self._sampwidth = sampwidth
 
@@ -374,7 +447,7 @@ class Wave_write:
     def setcomptype(self, comptype, compname):
         if self._datawritten:
             raise Error('cannot change parameters after starting to write')
-        if comptype not in ('NONE',):
+        if comptype not in ('NONE', 'FLOAT'):
             raise Error('unsupported compression type')
         self._comptype = comptype
         self._compname = compname
@@ -410,33 +483,38 @@ class Wave_write:
     def getmarkers(self):
         return None
 
+    def setrf64(self, rf64=True):
+        if self._headerwritten:
+            raise Error('cannot change parameters after starting to write')
+        self._rf64 = rf64
+
     def tell(self):
         return self._nframeswritten
 
     def writeframesraw(self, data):
+        if not isinstance(data, (bytes, bytearray)):
+            data = memoryview(data).cast('B') # e.g. an array, count its bytes
         self._ensure_header_written(len(data))
         nframes = len(data) // (self._sampwidth * self._nchannels)
         if self._convert:
             data = self._convert(data)
+        if not self._rf64 and self._headersize - 8 + self._datawritten + len(data) > _RIFF_LIMIT:
+            raise Error('a WAVE file is limited to 4 GB, use setrf64() for larger files')
         if self._sampwidth > 1 and big_endian:
-            import array
-            data = array.array(_array_fmts[self._sampwidth], data)
-            data.byteswap()
-            data.tofile(self._file)
-            self._datawritten = self._datawritten + len(data) * self._sampwidth
-        else:
-            self._file.write(data)
-            self._datawritten = self._datawritten + len(data)
+            data = _byteswap(data, self._sampwidth)
+        self._write(data)
+        self._datawritten = self._datawritten + len(data)
         self._nframeswritten = self._nframeswritten + nframes
 
     def writeframes(self, data):
         self.writeframesraw(data)
-        if self._datalength != self._datawritten:
+        if not self._buffersize and self._datalength != self._datawritten:
             self._patchheader()
 
     def close(self):
         if self._file:
             self._ensure_header_written(0)
+            self._flushbuffer()
             if self._datalength != self._datawritten:
                 self._patchheader()
             self._file.flush()
@@ -449,6 +527,22 @@ class Wave_write:
     # Internal methods.
     #
 
+    def _write(self, data):
+        if not self._buffersize:
+            self._file.write(data)
+            return
+        if len(self._buffer) + len(data) > self._buffersize:
+            self._flushbuffer()
+        if len(data) >= self._buffersize:
+            self._file.write(data)
+        else:
+            self._buffer += data
+
+    def _flushbuffer(self):
+        if self._buffer:
+            self._file.write(self._buffer)
+            del self._buffer[:]
+
     def _ensure_header_written(self, datasize):
         if not self._headerwritten:
             if not self._nchannels:
@@ -457,47 +551,84 @@ class Wave_write:
                 raise Error('sample width not specified')
             if not self._framerate:
                 raise Error('sampling rate not specified')
+            if self._comptype == 'FLOAT' and self._sampwidth not in (4, 8):
+                raise Error('float samples must be 4 or 8 bytes wide')
+            if self._comptype == 'NONE' and self._sampwidth > 4:
+                raise Error('bad sample width')
             self._write_header(datasize)
 
     def _write_header(self, initlength):
         assert not self._headerwritten
-        self._file.write(b'RIFF')
         if not self._nframes:
             self._nframes = initlength // (self._nchannels * self._sampwidth)
         self._datalength = self._nframes * self._nchannels * self._sampwidth
-        self._form_length_pos = self._file.tell()
-        self._file.write(struct.pack('<l4s4slhhllhh4s',
-            36 + self._datalength, b'WAVE', b'fmt ', 16,
-            WAVE_FORMAT_PCM, self._nchannels, self._framerate,
+        isfloat = self._comptype == 'FLOAT'
+        header = [b'RIFF', b'\0' * 4, b'WAVE']
+        if self._datalength > _RIFF_LIMIT - 100: # the announced size needs a ds64 chunk
+            self._rf64 = True
+        if self._rf64:
+            self._ds64_pos = len(b''.join(header))
+            header.append(struct.pack('<4sL', b'JUNK', _DS64_SIZE) + b'\0' * _DS64_SIZE)
+        header.append(struct.pack('<4sLHHLLHH', b'fmt ', 18 if isfloat else 16,
+            WAVE_FORMAT_IEEE_FLOAT if isfloat else WAVE_FORMAT_PCM,
+            self._nchannels, self._framerate,
             self._nchannels * self._framerate * self._sampwidth,
             self._nchannels * self._sampwidth,
-            self._sampwidth * 8, b'data'))
-        self._data_length_pos = self._file.tell()
-        self._file.write(struct.pack('<l', self._datalength*self._sampwidth))
+            self._sampwidth * 8))
+        if isfloat:
+            header.append(struct.pack('<H4sL', 0, b'fact', 4)) # cbSize, then the frame count every non-PCM file needs
+            self._fact_pos = len(b''.join(header))
+            header.append(b'\0' * 4)
+        header.append(b'data')
+        self._data_length_pos = len(b''.join(header))
+        header.append(b'\0' * 4)
+        header = bytearray(b''.join(header))
+        self._headersize = len(header)
+        for (pos, value) in self._sizes(self._datalength, self._nframes):
+            header[pos:pos + len(value)] = value
+        self._start = self._file.tell() # the header may not start at 0 in a file object
+        self._file.write(header)
         self._headerwritten = True
 
+    def _sizes(self, datalength, nframes):
+        """returns the (position in the header, bytes) of everything holding a size"""
+        riffsize = self._headersize - 8 + datalength
+        sizes = []
+        if self._rf64:
+            if riffsize > _RIFF_LIMIT:
+                sizes.append((0, struct.pack('<4sL', b'RF64', _RIFF_LIMIT)))
+                sizes.append((self._ds64_pos, struct.pack('<4sLQQQL', b'ds64', _DS64_SIZE, riffsize, datalength, nframes, 0)))
+                riffsize = datalength = nframes = _RIFF_LIMIT
+            else:
+                sizes.append((0, b'RIFF'))
+                sizes.append((self._ds64_pos, struct.pack('<4sL', b'JUNK', _DS64_SIZE) + b'\0' * _DS64_SIZE))
+        sizes.append((4, struct.pack('<L', riffsize)))
+        sizes.append((self._data_length_pos, struct.pack('<L', datalength)))
+        if self._comptype == 'FLOAT':
+            sizes.append((self._fact_pos, struct.pack('<L', min(nframes, _RIFF_LIMIT))))
+        return sizes
+
     def _patchheader(self):
         assert self._headerwritten
         if self._datawritten == self._datalength:
             return
         curpos = self._file.tell()
-        self._file.seek(self._form_length_pos, 0)
-        self._file.write(struct.pack('<l', 36 + self._datawritten))
-        self._file.seek(self._data_length_pos, 0)
-        self._file.write(struct.pack('<l', self._datawritten))
+        for (pos, value) in self._sizes(self._datawritten, self._nframeswritten):
+            self._file.seek(self._start + pos, 0)
+            self._file.write(value)
         self._file.seek(curpos, 0)
         self._datalength = self._datawritten
 
-def open(f, mode=None):
+def open(f, mode=None, buffersize=0, mapped=False):
     if mode is None:
         if hasattr(f, 'mode'):
             mode = f.mode
         else:
             mode = 'rb'
     if mode in ('r', 'rb'):
-        return Wave_read(f)
+        return Wave_read(f, mapped)
     elif mode in ('w', 'wb'):
-        return Wave_write(f)
+        return Wave_write(f, buffersize)
     else:
         raise Error("mode must be 'r', 'rb', 'w', or 'wb'")
 